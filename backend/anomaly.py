@@ -0,0 +1,96 @@
+import math
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+
+class Baseline:
+    """Exponentially weighted mean and variance of response time"""
+
+    __slots__ = ("mean", "var", "count")
+
+    def __init__(self):
+        self.mean = 0.0
+        self.var = 0.0
+        self.count = 0
+
+    def score(self, value: float) -> float:
+        """How many deviations value sits above the mean, with a noise floor on the deviation"""
+        std = max(math.sqrt(self.var), 10.0, 0.05 * self.mean)
+        return (value - self.mean) / std
+
+    def update(self, value: float, alpha: float, track_variance: bool = True):
+        if self.count == 0:
+            self.mean = value
+        else:
+            diff = value - self.mean
+            increment = alpha * diff
+            self.mean += increment
+            if track_variance:
+                self.var = (1 - alpha) * (self.var + diff * increment)
+        self.count += 1
+
+
+class TargetState:
+    __slots__ = ("overall", "hourly", "streak")
+
+    def __init__(self, seasonal: bool):
+        self.overall = Baseline()
+        self.hourly: Optional[List[Baseline]] = [Baseline() for _ in range(24)] if seasonal else None
+        self.streak = 0  # consecutive anomalous checks
+
+
+class LatencyDetector:
+    """Flag sustained response-time regressions per target in constant memory"""
+
+    def __init__(
+        self,
+        threshold: float = 4.0,
+        sustain: int = 3,
+        alpha: float = 0.05,
+        warmup: int = 20,
+        min_increase_ms: float = 100.0,
+        seasonal: bool = False,
+    ):
+        self.threshold = threshold
+        self.sustain = sustain
+        self.alpha = alpha
+        self.warmup = warmup
+        self.min_increase_ms = min_increase_ms
+        self.seasonal = seasonal
+        self.targets: Dict[str, TargetState] = {}
+
+    def observe(self, website: str, response_time: float, checked_at: datetime) -> Tuple[bool, float]:
+        """Score a successful check against the target's baseline and return (degraded, score)"""
+        state = self.targets.get(website)
+        if state is None:
+            state = self.targets[website] = TargetState(self.seasonal)
+
+        baselines = [state.overall]
+        if state.hourly is not None:
+            hourly = state.hourly[checked_at.hour]
+            baselines.append(hourly)
+            # Compare against the hour-of-day baseline once it has seen enough checks
+            if hourly.count >= self.warmup:
+                baselines.reverse()
+
+        reference = baselines[0]
+        score = 0.0
+        anomalous = False
+        if reference.count >= self.warmup:
+            score = reference.score(response_time)
+            anomalous = (
+                score >= self.threshold
+                and response_time - reference.mean >= self.min_increase_ms
+            )
+        state.streak = state.streak + 1 if anomalous else 0
+
+        # Anomalous checks only nudge the mean and leave the variance alone, so a
+        # sustained regression keeps scoring high instead of widening the baseline
+        alpha = self.alpha * 0.1 if anomalous else self.alpha
+        for baseline in baselines:
+            baseline.update(response_time, alpha, track_variance=not anomalous)
+
+        return state.streak >= self.sustain, round(score, 2)
+
+    def forget(self, website: str):
+        self.targets.pop(website, None)
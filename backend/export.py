@@ -0,0 +1,85 @@
+import csv
+import io
+import json
+import zlib
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, List, Optional
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+EXPORT_FIELDS = [
+    "website", "status", "responseTime", "statusCode", "checkedAt",
+    "degradedReason", "anomalyScore", "agent", "region"
+]
+
+
+def to_naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Normalize query datetimes to the naive UTC values stored by the monitor"""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _format_rows(rows: List[Dict], fmt: str) -> str:
+    """Render a batch of status records as NDJSON lines or CSV rows"""
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow([
+                row[field].isoformat() if isinstance(row.get(field), datetime) else row.get(field)
+                for field in EXPORT_FIELDS
+            ])
+        return buffer.getvalue()
+
+    return "".join(
+        json.dumps({
+            field: row[field].isoformat() if isinstance(row.get(field), datetime) else row.get(field)
+            for field in EXPORT_FIELDS
+        }) + "\n"
+        for row in rows
+    )
+
+
+async def iter_status_export(
+    db: AsyncIOMotorDatabase,
+    website: str,
+    start: datetime,
+    end: datetime,
+    fmt: str = "ndjson",
+    compress: bool = False,
+    batch_size: int = 2000,
+) -> AsyncIterator[bytes]:
+    """Stream status history for one website as encoded chunks, one cursor batch at a time"""
+    # wbits=31 writes a gzip header so the stream can be served as Content-Encoding: gzip
+    gzipper = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+
+    def encode(text: str) -> bytes:
+        data = text.encode("utf-8")
+        return gzipper.compress(data) if gzipper else data
+
+    if fmt == "csv":
+        yield encode(",".join(EXPORT_FIELDS) + "\r\n")
+
+    cursor = db.website_status.find(
+        {"website": website, "checkedAt": {"$gte": start, "$lt": end}},
+        {field: 1 for field in EXPORT_FIELDS} | {"_id": 0},
+    ).sort("checkedAt", 1).batch_size(batch_size)
+
+    rows = []
+    async for doc in cursor:
+        rows.append(doc)
+        if len(rows) >= batch_size:
+            chunk = encode(_format_rows(rows, fmt))
+            rows = []
+            if chunk:
+                yield chunk
+
+    if rows:
+        yield encode(_format_rows(rows, fmt))
+    if gzipper:
+        yield gzipper.flush()
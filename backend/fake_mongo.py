@@ -0,0 +1,234 @@
+"""In-memory stand-in for the subset of the Motor API used by the backend.
+
+Used by the load-test harness so the API can be exercised without a MongoDB
+server. Range queries on ``checkedAt`` for a single website are answered from
+a per-website sorted index, roughly matching the cost profile of a real
+``{website: 1, checkedAt: 1}`` index. Every operation and every cursor batch
+yields to the event loop, like a round trip to a real server, so concurrent
+requests interleave instead of running one after another.
+"""
+import asyncio
+import bisect
+from types import SimpleNamespace
+from typing import Any, Dict, Iterable, List, Optional
+from bson import ObjectId
+
+_OPERATORS = {
+    "$gte": lambda value, arg: value is not None and value >= arg,
+    "$gt": lambda value, arg: value is not None and value > arg,
+    "$lte": lambda value, arg: value is not None and value <= arg,
+    "$lt": lambda value, arg: value is not None and value < arg,
+    "$ne": lambda value, arg: value != arg,
+    "$in": lambda value, arg: value in arg,
+    "$nin": lambda value, arg: value not in arg,
+}
+
+
+def _matches(doc: Dict, query: Dict) -> bool:
+    for field, condition in query.items():
+        value = doc.get(field)
+        if isinstance(condition, dict) and condition and all(key.startswith("$") for key in condition):
+            if not all(_OPERATORS[op](value, arg) for op, arg in condition.items()):
+                return False
+        elif value != condition:
+            return False
+    return True
+
+
+def _project(doc: Dict, projection: Optional[Dict]) -> Dict:
+    if not projection:
+        return dict(doc)
+    included = [field for field, flag in projection.items() if flag and field != "_id"]
+    if included:
+        result = {field: doc[field] for field in included if field in doc}
+        if projection.get("_id", 1) and "_id" in doc:
+            result["_id"] = doc["_id"]
+        return result
+    return {field: value for field, value in doc.items() if projection.get(field, 1)}
+
+
+class FakeCursor:
+    def __init__(self, docs: List[Dict], projection: Optional[Dict] = None):
+        self._docs = docs
+        self._projection = projection
+        self._sort: List = []
+        self._limit = 0
+        self._batch_size = 101  # MongoDB's default first batch
+
+    def sort(self, key, direction: Optional[int] = None):
+        self._sort = [(key, direction or 1)] if isinstance(key, str) else list(key)
+        return self
+
+    def limit(self, limit: int):
+        self._limit = limit
+        return self
+
+    def batch_size(self, batch_size: int):
+        self._batch_size = batch_size
+        return self
+
+    def _results(self) -> List[Dict]:
+        docs = self._docs
+        for field, direction in reversed(self._sort):
+            docs = sorted(docs, key=lambda doc: doc.get(field), reverse=direction < 0)
+        if self._limit:
+            docs = docs[:self._limit]
+        return [_project(doc, self._projection) for doc in docs]
+
+    async def to_list(self, length: Optional[int] = None) -> List[Dict]:
+        await asyncio.sleep(0)
+        results = self._results()
+        return results[:length] if length else results
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for i, doc in enumerate(self._results()):
+            if i % self._batch_size == 0:
+                await asyncio.sleep(0)
+            yield doc
+
+
+class FakeCollection:
+    def __init__(self, name: str):
+        self.name = name
+        self.docs: List[Dict] = []
+        self._index: Optional[Dict[Any, tuple]] = None
+
+    def _website_index(self) -> Dict[Any, tuple]:
+        """Per-website (checkedAt keys, docs) sorted by checkedAt, rebuilt after writes"""
+        if self._index is None:
+            grouped: Dict[Any, List[Dict]] = {}
+            for doc in self.docs:
+                grouped.setdefault(doc.get("website"), []).append(doc)
+            self._index = {}
+            for website, docs in grouped.items():
+                docs.sort(key=lambda doc: doc.get("checkedAt"))
+                self._index[website] = ([doc.get("checkedAt") for doc in docs], docs)
+        return self._index
+
+    def _candidates(self, query: Dict) -> Iterable[Dict]:
+        website = query.get("website")
+        checked_at = query.get("checkedAt")
+        if isinstance(website, str) and isinstance(checked_at, dict) and "checkedAt" in query:
+            keys, docs = self._website_index().get(website, ([], []))
+            lo = bisect.bisect_left(keys, checked_at["$gte"]) if "$gte" in checked_at else 0
+            hi = bisect.bisect_left(keys, checked_at["$lt"]) if "$lt" in checked_at else len(keys)
+            return docs[lo:hi]
+        if isinstance(website, str):
+            return self._website_index().get(website, ([], []))[1]
+        return self.docs
+
+    def _filter(self, query: Optional[Dict]) -> List[Dict]:
+        query = query or {}
+        return [doc for doc in self._candidates(query) if _matches(doc, query)]
+
+    def find(self, query: Optional[Dict] = None, projection: Optional[Dict] = None) -> FakeCursor:
+        return FakeCursor(self._filter(query), projection)
+
+    async def find_one(self, query: Optional[Dict] = None, projection: Optional[Dict] = None, sort=None):
+        cursor = self.find(query, projection)
+        if sort:
+            cursor.sort(sort)
+        results = await cursor.limit(1).to_list(1)
+        return results[0] if results else None
+
+    async def insert_one(self, doc: Dict):
+        await asyncio.sleep(0)
+        doc.setdefault("_id", ObjectId())
+        self.docs.append(dict(doc))
+        self._index = None
+        return SimpleNamespace(inserted_id=doc["_id"])
+
+    async def insert_many(self, docs: List[Dict], ordered: bool = True):
+        await asyncio.sleep(0)
+        for doc in docs:
+            doc.setdefault("_id", ObjectId())
+            self.docs.append(dict(doc))
+        self._index = None
+        return SimpleNamespace(inserted_ids=[doc["_id"] for doc in docs])
+
+    async def update_one(self, query: Dict, update: Dict, upsert: bool = False):
+        """Apply a $set update to the first match, inserting one built from the query if upsert"""
+        await asyncio.sleep(0)
+        matches = self._filter(query)
+        if matches:
+            matches[0].update(update.get("$set", {}))
+            self._index = None
+            return SimpleNamespace(matched_count=1, modified_count=1, upserted_id=None)
+        if not upsert:
+            return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=None)
+        doc = {field: value for field, value in query.items() if not isinstance(value, dict)}
+        doc.update(update.get("$set", {}))
+        doc.setdefault("_id", ObjectId())
+        self.docs.append(doc)
+        self._index = None
+        return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=doc["_id"])
+
+    async def find_one_and_update(self, query: Dict, update: Dict):
+        """Apply a $set update to the first match and return it as it was before"""
+        await asyncio.sleep(0)
+        matches = self._filter(query)
+        if not matches:
+            return None
+        before = dict(matches[0])
+        matches[0].update(update.get("$set", {}))
+        self._index = None
+        return before
+
+    async def bulk_write(self, requests: List, ordered: bool = True):
+        """Run UpdateOne requests, the only bulk operation the backend issues"""
+        for request in requests:
+            await self.update_one(request._filter, request._doc, upsert=request._upsert)
+        return SimpleNamespace(bulk_api_result={})
+
+    async def delete_many(self, query: Dict):
+        await asyncio.sleep(0)
+        before = len(self.docs)
+        self.docs = [doc for doc in self.docs if not _matches(doc, query)]
+        self._index = None
+        return SimpleNamespace(deleted_count=before - len(self.docs))
+
+    async def distinct(self, key: str, query: Optional[Dict] = None) -> List:
+        await asyncio.sleep(0)
+        return list(dict.fromkeys(doc.get(key) for doc in self._filter(query)))
+
+    async def create_index(self, keys, **kwargs) -> str:
+        await asyncio.sleep(0)
+        return keys if isinstance(keys, str) else "_".join(f"{field}_{direction}" for field, direction in keys)
+
+
+class FakeDatabase:
+    def __init__(self, name: str):
+        self.name = name
+        self._collections: Dict[str, FakeCollection] = {}
+
+    def __getitem__(self, name: str) -> FakeCollection:
+        if name not in self._collections:
+            self._collections[name] = FakeCollection(name)
+        return self._collections[name]
+
+    def __getattr__(self, name: str) -> FakeCollection:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    async def command(self, name: str, *args, **kwargs) -> Dict:
+        await asyncio.sleep(0)
+        return {"ok": 1.0}
+
+
+class FakeMongoClient:
+    """Drop-in for AsyncIOMotorClient backed by process memory"""
+
+    def __init__(self, *args, **kwargs):
+        self._databases: Dict[str, FakeDatabase] = {}
+
+    def __getitem__(self, name: str) -> FakeDatabase:
+        if name not in self._databases:
+            self._databases[name] = FakeDatabase(name)
+        return self._databases[name]
+
+    def close(self):
+        pass
@@ -0,0 +1,62 @@
+import hmac
+import zlib
+from typing import AsyncIterator, Dict, Optional
+
+# Request bodies larger than this, before or after decompression, are rejected
+MAX_INGEST_BYTES = 16 * 1024 * 1024
+
+
+def parse_agent_tokens(value: str) -> Dict[str, str]:
+    """Parse INGEST_TOKENS ("agent-id=token,agent-id=token") into a token -> agent map"""
+    tokens = {}
+    for pair in value.split(","):
+        agent, _, token = pair.strip().partition("=")
+        if agent and token:
+            tokens[token] = agent
+    return tokens
+
+
+def authenticate_agent(tokens: Dict[str, str], authorization: Optional[str]) -> Optional[str]:
+    """Return the agent id for a "Bearer <token>" header, or None if it is not a known token"""
+    scheme, _, presented = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not presented:
+        return None
+
+    agent = None
+    for token, token_agent in tokens.items():
+        # Compare against every token so timing does not reveal which one matched
+        if hmac.compare_digest(token.encode(), presented.encode()):
+            agent = token_agent
+    return agent
+
+
+async def read_limited(chunks: AsyncIterator[bytes], max_size: int = MAX_INGEST_BYTES) -> bytes:
+    """Read a streamed request body, giving up as soon as it grows past max_size"""
+    body = bytearray()
+    async for chunk in chunks:
+        body.extend(chunk)
+        if len(body) > max_size:
+            raise OverflowError("Request body too large")
+    return bytes(body)
+
+
+def decode_body(body: bytes, content_encoding: Optional[str], max_size: int = MAX_INGEST_BYTES) -> bytes:
+    """Decompress a gzip/deflate request body, refusing anything that inflates past max_size"""
+    encoding = (content_encoding or "identity").lower()
+    if encoding == "identity":
+        data = body
+    elif encoding in ("gzip", "deflate"):
+        # 47 auto-detects zlib and gzip headers
+        decompressor = zlib.decompressobj(47)
+        try:
+            data = decompressor.decompress(body, max_size + 1)
+        except zlib.error as e:
+            raise ValueError(f"Invalid {encoding} body: {e}") from e
+        if len(data) <= max_size and not decompressor.eof:
+            raise ValueError(f"Truncated {encoding} body")
+    else:
+        raise ValueError(f"Unsupported content encoding: {content_encoding}")
+
+    if len(data) > max_size:
+        raise OverflowError("Request body too large")
+    return data
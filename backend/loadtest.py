@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Offline load test for the status API.
+
+Seeds an in-memory MongoDB stand-in (or a real database with --mongo-url) with
+synthetic checks, drives the FastAPI app in-process through ASGI with
+concurrent clients and prints throughput and latency percentiles per scenario
+as JSON, so results can be diffed between releases.
+
+    python loadtest.py --sites 50 --days 7 --concurrency 20 --duration 15
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List
+import numpy as np
+
+# A scenario is a list of requests issued one after another by a single client
+SCENARIOS = {
+    "websites": ["/api/status/websites"],
+    "uptime": ["/api/status/uptime"],
+    "dashboard": ["/api/status/dashboard"],
+    "websites+uptime": ["/api/status/websites", "/api/status/uptime"],
+}
+
+
+def load_app(mongo_url: str, db_name: str):
+    """Import the server against a real database or, without a URL, the in-memory stand-in"""
+    os.environ["MONGO_URL"] = mongo_url or "mongodb://loadtest"
+    os.environ["DB_NAME"] = db_name
+    # Never take the monitor role or read a running server's status snapshot
+    os.environ["RUN_MONITOR"] = "0"
+    os.environ["RUNTIME_DIR"] = tempfile.mkdtemp(prefix="loadtest-")
+    if not mongo_url:
+        import motor.motor_asyncio
+        from fake_mongo import FakeMongoClient
+        motor.motor_asyncio.AsyncIOMotorClient = FakeMongoClient
+
+    import server
+    return server
+
+
+def synthetic_checks(website: str, start: datetime, end: datetime, interval: int) -> List[Dict]:
+    """Generate checks for one website with occasional multi-check outages"""
+    checks = []
+    down_until = start
+    checked_at = start
+    while checked_at < end:
+        if checked_at >= down_until and random.random() < 0.002:
+            down_until = checked_at + timedelta(seconds=interval * random.randint(1, 20))
+        if checked_at < down_until:
+            status, status_code, response_time = "offline", 0, 5000
+        else:
+            status, status_code, response_time = "online", 200, max(20, int(random.gauss(180, 40)))
+        checks.append({
+            "id": str(uuid.uuid4()),
+            "website": website,
+            "status": status,
+            "responseTime": response_time,
+            "statusCode": status_code,
+            "checkedAt": checked_at,
+            "createdAt": checked_at
+        })
+        checked_at += timedelta(seconds=interval)
+    return checks
+
+
+async def seed(server, websites: List[str], days: int, interval: int):
+    end = datetime.utcnow()
+    start = end - timedelta(days=days)
+    for website in websites:
+        await server.db.website_status.insert_many(synthetic_checks(website, start, end, interval))
+
+
+async def asgi_get(app, path: str) -> int:
+    """Issue a GET directly against the ASGI app and return the response status"""
+    path, _, query = path.partition("?")
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [(b"host", b"loadtest"), (b"accept-encoding", b"gzip, br")],
+        "client": ("127.0.0.1", 0),
+        "server": ("loadtest", 80),
+    }
+    request_sent = False
+    status = 0
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # The client never disconnects; wait until the app is done with us
+        await asyncio.Future()
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+async def run_scenario(app, paths: List[str], concurrency: int, duration: float) -> Dict:
+    """Run clients in a closed loop for duration seconds and summarize their latencies"""
+    latencies: List[float] = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def client():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            for path in paths:
+                if await asgi_get(app, path) != 200:
+                    errors += 1
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    samples = np.array(latencies)
+    p50, p95, p99 = np.percentile(samples, [50, 95, 99]) if len(samples) else (0.0, 0.0, 0.0)
+    return {
+        "paths": paths,
+        "iterations": len(latencies),
+        "errors": errors,
+        "durationSeconds": round(elapsed, 3),
+        "throughput": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "latencyMs": {
+            "p50": round(float(p50), 2),
+            "p95": round(float(p95), 2),
+            "p99": round(float(p99), 2),
+            "mean": round(float(samples.mean()), 2) if len(samples) else 0.0,
+            "max": round(float(samples.max()), 2) if len(samples) else 0.0,
+        },
+    }
+
+
+async def main(args) -> Dict:
+    server = load_app(args.mongo_url, args.db_name)
+    from targets import parse_targets
+    websites = [f"site-{i}.loadtest.local" for i in range(args.sites)]
+    server.target_registry.targets = parse_targets(
+        [{"name": website, "url": f"https://{website}"} for website in websites]
+    )
+
+    if not args.no_seed:
+        seed_started = time.perf_counter()
+        await seed(server, websites, args.days, args.interval)
+        print(f"Seeded {args.sites} sites x {args.days} days in "
+              f"{time.perf_counter() - seed_started:.1f}s", file=sys.stderr)
+
+    results = {}
+    for name in args.scenarios:
+        print(f"Running {name}...", file=sys.stderr)
+        results[name] = await run_scenario(server.app, SCENARIOS[name], args.concurrency, args.duration)
+
+    return {
+        "config": {
+            "sites": args.sites,
+            "days": args.days,
+            "interval": args.interval,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "backend": "mongodb" if args.mongo_url else "memory",
+        },
+        "startedAt": datetime.utcnow().isoformat(),
+        "results": results,
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Load test the status API against synthetic history")
+    parser.add_argument("--sites", type=int, default=3, help="number of monitored sites")
+    parser.add_argument("--days", type=int, default=1, help="days of history per site")
+    parser.add_argument("--interval", type=int, default=30, help="seconds between synthetic checks")
+    parser.add_argument("--concurrency", type=int, default=10, help="concurrent clients per scenario")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds to run each scenario")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--mongo-url", help="use a real MongoDB instead of the in-memory stand-in")
+    parser.add_argument("--db-name", default="loadtest", help="database to seed and query")
+    parser.add_argument("--no-seed", action="store_true", help="reuse data already in the database")
+    parser.add_argument("--output", help="write the JSON report to this file instead of stdout")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    report = asyncio.run(main(args))
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from typing import List, Literal, Optional, Dict, Any
 from datetime import datetime
 import uuid
 
@@ -16,8 +16,12 @@ class WebsiteStatus(BaseModel):
     status: str  # online, offline, degraded
     responseTime: int
     statusCode: int
+    degradedReason: Optional[str] = None  # status_code, or latency on a slow but online check
+    anomalyScore: Optional[float] = None  # latency deviation from the target's baseline
     checkedAt: datetime = Field(default_factory=datetime.utcnow)
     createdAt: datetime = Field(default_factory=datetime.utcnow)
+    agent: Optional[str] = None  # remote probe agent, None for the API host
+    region: Optional[str] = None
 
 class WebsiteStatusResponse(BaseModel):
     website: str
@@ -25,6 +29,8 @@ class WebsiteStatusResponse(BaseModel):
     responseTime: int
     lastChecked: datetime
     statusCode: int
+    degradedReason: Optional[str] = None
+    anomalyScore: Optional[float] = None
 
 class UptimeHistory(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -46,4 +52,28 @@ class UptimeData(BaseModel):
     incidents: int
 
 class UptimeResponse(BaseModel):
-    uptime: List[UptimeData]
\ No newline at end of file
+    uptime: List[UptimeData]
+
+# Monitoring Target Models
+class Target(BaseModel):
+    name: str  # hostname used as the website key, e.g. loyalhood.xyz
+    url: str
+    interval: int = 30  # seconds between checks
+    timeout: float = 5.0  # seconds
+    probeType: str = "http"  # http (GET) or head (HEAD)
+    expectedStatus: int = 200
+    enabled: bool = True
+
+
+# Probe Agent Ingest Models
+class IngestResult(BaseModel):
+    id: Optional[str] = None  # set by the agent so a retried batch is stored once
+    website: str
+    status: Literal["online", "degraded", "offline"]
+    responseTime: int
+    statusCode: int
+    checkedAt: datetime
+
+class IngestBatch(BaseModel):
+    region: str
+    results: List[IngestResult]
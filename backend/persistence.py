@@ -0,0 +1,172 @@
+import asyncio
+import itertools
+import logging
+import os
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+from bson import ObjectId, json_util
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY_ERROR = 11000
+
+
+async def insert_new(collection: AsyncIOMotorCollection, docs: List[Dict]) -> int:
+    """Insert results unordered, treating already-stored ones (same _id) as written; return how many were new"""
+    try:
+        await collection.insert_many(docs, ordered=False)
+        return len(docs)
+    except BulkWriteError as e:
+        errors = e.details.get("writeErrors", [])
+        if e.details.get("writeConcernErrors") or any(
+            error.get("code") != DUPLICATE_KEY_ERROR for error in errors
+        ):
+            raise
+        return e.details.get("nInserted", len(docs) - len(errors))
+
+
+class ResultWriter:
+    """Persist probe results off the probe loop, spilling to disk while the database is unavailable"""
+
+    def __init__(
+        self,
+        collection: AsyncIOMotorCollection,
+        spill_path: Optional[Path],
+        max_queue: int = 1000,
+        batch_size: int = 200,
+        retry_interval: float = 5.0,
+        on_replay: Optional[Callable[[List[Dict]], Awaitable]] = None,
+    ):
+        self.collection = collection
+        # Called with each replayed chunk, whose results may be older than anything cached from them
+        self.on_replay = on_replay
+        # Without a spill path, results that cannot be written are dropped
+        self.spill_path = Path(spill_path) if spill_path else None
+        self.replay_path = (
+            self.spill_path.with_suffix(self.spill_path.suffix + ".replaying") if self.spill_path else None
+        )
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.batch_size = batch_size
+        self.retry_interval = retry_interval
+        self.healthy = True
+        self.running = False
+        self.stats = {"written": 0, "spilled": 0, "replayed": 0, "dropped": 0}
+
+    @property
+    def has_spill(self) -> bool:
+        if self.spill_path is None:
+            return False
+        return self.spill_path.exists() or self.replay_path.exists()
+
+    def submit(self, doc: Dict):
+        """Queue a result for persistence without waiting; spill it to disk if the queue is full"""
+        # Fixed before the first attempt so a retried or replayed write is stored only once
+        doc.setdefault("_id", ObjectId())
+        try:
+            self.queue.put_nowait(doc)
+        except asyncio.QueueFull:
+            self._spill([json_util.dumps(doc) + "\n"])
+            if self.healthy and self.spill_path is not None:
+                logger.warning("Result queue full, spilling results to disk")
+            # Replayed once the writer catches up, even though the database itself is fine
+            self.healthy = False
+
+    def _spill(self, lines: List[str]):
+        """Append serialized results to the spill file"""
+        if self.spill_path is None:
+            self.stats["dropped"] += len(lines)
+            logger.warning(f"Dropped {len(lines)} results that could not be written")
+            return
+        self.spill_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.spill_path, "a", encoding="utf-8") as spill:
+            spill.writelines(lines)
+        self.stats["spilled"] += len(lines)
+
+    async def _insert(self, docs: List[Dict]):
+        await insert_new(self.collection, docs)
+
+    async def _drain_batch(self) -> List[Dict]:
+        """Wait for one result, then take whatever else is already queued up to batch_size"""
+        batch = [await self.queue.get()]
+        while len(batch) < self.batch_size and not self.queue.empty():
+            batch.append(self.queue.get_nowait())
+        return batch
+
+    async def _replay_chunk(self, lines: List[str]):
+        docs = [json_util.loads(line) for line in lines]
+        await self._insert(docs)
+        self.stats["replayed"] += len(docs)
+        if self.on_replay:
+            await self.on_replay(docs)
+
+    async def _replay_spill(self):
+        """Insert spilled results back into the database, oldest first, batch_size at a time"""
+        while self.has_spill:
+            # Results spilled during the replay go to a fresh file instead of the one being read
+            if not self.replay_path.exists():
+                os.replace(self.spill_path, self.replay_path)
+
+            replayed = 0
+            with open(self.replay_path, encoding="utf-8") as spill:
+                chunk = []
+                try:
+                    for line in spill:
+                        if not line.strip():
+                            continue
+                        chunk.append(line)
+                        if len(chunk) == self.batch_size:
+                            await self._replay_chunk(chunk)
+                            replayed += len(chunk)
+                            chunk = []
+                    if chunk:
+                        await self._replay_chunk(chunk)
+                        replayed += len(chunk)
+                except Exception:
+                    # Keep the failed chunk and the unread rest of the file for the next attempt
+                    while chunk:
+                        self._spill(chunk)
+                        chunk = list(itertools.islice(spill, self.batch_size))
+                    self.replay_path.unlink()
+                    raise
+
+            self.replay_path.unlink()
+            logger.info(f"Replayed {replayed} spilled results")
+
+    async def run(self):
+        """Consume queued results until stopped, replaying spilled ones once writes succeed again"""
+        self.running = True
+        self.healthy = not self.has_spill
+
+        while self.running:
+            batch = await self._drain_batch()
+            written = False
+            try:
+                await self._insert(batch)
+                written = True
+                self.stats["written"] += len(batch)
+                if not self.healthy:
+                    await self._replay_spill()
+                    logger.info("Result writes caught up")
+                    self.healthy = True
+            except asyncio.CancelledError:
+                if not written:
+                    self._spill([json_util.dumps(doc) + "\n" for doc in batch])
+                raise
+            except Exception as e:
+                if self.healthy:
+                    logger.error(f"Database write failed, spilling results to disk: {e}")
+                    self.healthy = False
+                if not written:
+                    self._spill([json_util.dumps(doc) + "\n" for doc in batch])
+                await asyncio.sleep(self.retry_interval)
+
+    def stop(self):
+        """Stop consuming and spill anything still queued so it is replayed on the next start"""
+        self.running = False
+        pending = []
+        while not self.queue.empty():
+            pending.append(json_util.dumps(self.queue.get_nowait()) + "\n")
+        if pending:
+            self._spill(pending)
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Standalone probe agent.
+
+Checks the monitored targets from wherever it runs, using the same probe logic
+as the API host, and pushes gzip-compressed batches of results to the API's
+/api/ingest/results endpoint tagged with its region.
+
+    python probe_agent.py --server http://localhost:8001 --token secret --region eu-west
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import logging
+import os
+import sys
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import aiohttp
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from models import Target  # noqa: E402
+from targets import parse_targets  # noqa: E402
+from website_monitor import WebsiteMonitor  # noqa: E402
+
+logger = logging.getLogger("probe_agent")
+
+
+class ProbeAgent:
+    def __init__(
+        self,
+        server_url: str,
+        token: str,
+        region: str,
+        interval: int = 30,
+        targets_file: Optional[str] = None,
+        max_buffer: int = 50000,
+        batch_size: int = 1000,
+        max_concurrency: int = 50,
+    ):
+        self.api_url = f"{server_url.rstrip('/')}/api"
+        self.token = token
+        self.region = region
+        self.interval = interval
+        self.targets_file = targets_file
+        self.max_buffer = max_buffer
+        self.batch_size = batch_size
+        self.probe_slots = asyncio.Semaphore(max_concurrency)
+        self.targets: List[Target] = []
+        self.buffer: List[Dict] = []
+        self.running = False
+
+    async def load_targets(self, session: aiohttp.ClientSession):
+        """Load targets from a local file, or from the API so agents follow its registry"""
+        try:
+            if self.targets_file:
+                with open(self.targets_file, encoding="utf-8") as f:
+                    items = json.load(f)
+            else:
+                async with session.get(f"{self.api_url}/targets") as response:
+                    response.raise_for_status()
+                    items = (await response.json())["targets"]
+            self.targets = [target for target in parse_targets(items).values() if target.enabled]
+        except Exception as e:
+            logger.error(f"Failed to load targets, keeping {len(self.targets)} current ones: {e}")
+
+    async def probe(self, target: Target) -> Dict:
+        async with self.probe_slots:
+            status, response_time, status_code = await WebsiteMonitor.check_website(
+                target.url, target.timeout, target.expectedStatus, target.probeType
+            )
+        return {
+            "id": str(uuid.uuid4()),
+            "website": target.name,
+            "status": status,
+            "responseTime": response_time,
+            "statusCode": status_code,
+            "checkedAt": datetime.utcnow().isoformat()
+        }
+
+    async def sweep(self):
+        """Probe every target once and buffer the results"""
+        results = await asyncio.gather(*(self.probe(target) for target in self.targets))
+        self.buffer.extend(results)
+        if len(self.buffer) > self.max_buffer:
+            dropped = len(self.buffer) - self.max_buffer
+            del self.buffer[:dropped]
+            logger.warning(f"Result buffer full, dropped {dropped} oldest results")
+        logger.info(f"Probed {len(results)} targets, {len(self.buffer)} results buffered")
+
+    async def push(self, session: aiohttp.ClientSession):
+        """Send buffered results in batches, keeping whatever could not be delivered"""
+        while self.buffer:
+            batch = self.buffer[:self.batch_size]
+            body = gzip.compress(json.dumps({"region": self.region, "results": batch}).encode())
+            try:
+                async with session.post(
+                    f"{self.api_url}/ingest/results",
+                    data=body,
+                    headers={
+                        "Authorization": f"Bearer {self.token}",
+                        "Content-Type": "application/json",
+                        "Content-Encoding": "gzip"
+                    }
+                ) as response:
+                    if response.status in (400, 422):
+                        # Malformed batch: the server will not accept it on retry either
+                        logger.error(f"Ingest rejected batch: HTTP {response.status} {await response.text()}")
+                        del self.buffer[:len(batch)]
+                        continue
+                    if response.status == 413 and len(batch) > 1:
+                        self.batch_size = max(len(batch) // 2, 1)
+                        logger.warning(f"Ingest batch too large, retrying with {self.batch_size} results")
+                        continue
+                    if response.status >= 400:
+                        # Bad credentials or a server error: keep the results until it is fixed
+                        logger.error(f"Ingest failed: HTTP {response.status} {await response.text()}")
+                        return
+                    accepted = await response.json()
+                    if accepted.get("rejected"):
+                        logger.warning(f"Ingest rejected {len(accepted['rejected'])} results: {accepted['rejected'][:5]}")
+            except aiohttp.ClientError as e:
+                logger.warning(f"Failed to push results: {e}")
+                return
+            del self.buffer[:len(batch)]
+
+    async def run(self):
+        self.running = True
+        timeout = aiohttp.ClientTimeout(total=30)
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            while self.running:
+                started = time.monotonic()
+                await self.load_targets(session)
+                await self.sweep()
+                await self.push(session)
+                await asyncio.sleep(max(self.interval - (time.monotonic() - started), 0))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Probe monitored targets and push results to the API")
+    parser.add_argument("--server", default=os.environ.get("PROBE_AGENT_SERVER", "http://localhost:8001"))
+    parser.add_argument("--token", default=os.environ.get("PROBE_AGENT_TOKEN"))
+    parser.add_argument("--region", default=os.environ.get("PROBE_AGENT_REGION"))
+    parser.add_argument("--interval", type=int, default=30, help="seconds between sweeps")
+    parser.add_argument("--targets-file", help="probe targets from this JSON file instead of the API")
+    parser.add_argument("--batch-size", type=int, default=1000, help="results per ingest request")
+    args = parser.parse_args()
+    if not args.token or not args.region:
+        parser.error("--token and --region are required (or PROBE_AGENT_TOKEN / PROBE_AGENT_REGION)")
+    return args
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    args = parse_args()
+    agent = ProbeAgent(
+        args.server,
+        args.token,
+        args.region,
+        interval=args.interval,
+        targets_file=args.targets_file,
+        batch_size=args.batch_size
+    )
+    try:
+        asyncio.run(agent.run())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,216 @@
+import asyncio
+import functools
+import logging
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+from fastapi.routing import APIRoute
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+
+class RequestStats:
+    """Timings collected for one API request"""
+
+    __slots__ = ("path", "db_time", "db_ops", "route_time", "endpoint_time", "serialize_time")
+
+    def __init__(self, path: str):
+        self.path = path
+        self.db_time = 0.0  # seconds, summed over commands (may overlap when run concurrently)
+        self.db_ops = 0
+        self.route_time = 0.0
+        self.endpoint_time = 0.0
+        self.serialize_time = 0.0
+
+    def server_timing(self, total: float) -> str:
+        # Time FastAPI spends around the endpoint is validation and response serialization
+        serialize = self.serialize_time + max(self.route_time - self.endpoint_time, 0.0)
+        return ", ".join([
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.db_ops} ops"',
+            f"serialize;dur={serialize * 1000:.1f}",
+            f"total;dur={total * 1000:.1f}",
+        ])
+
+
+current_stats: ContextVar[Optional[RequestStats]] = ContextVar("current_stats", default=None)
+
+
+def record_serialization(seconds: float):
+    """Account for serialization done inside an endpoint, e.g. when it builds its own Response"""
+    stats = current_stats.get()
+    if stats is not None:
+        stats.serialize_time += seconds
+
+
+class CommandMonitor(monitoring.CommandListener):
+    """Attribute MongoDB command time to the current request and log slow commands"""
+
+    def __init__(self, slow_threshold_ms: float = 100.0):
+        self.slow_threshold_ms = slow_threshold_ms
+        self._pending: Dict[Tuple, Tuple[Optional[RequestStats], str]] = {}
+
+    def started(self, event):
+        # Motor runs commands on worker threads with a copy of the caller's context
+        target = event.command.get(event.command_name)
+        collection = target if isinstance(target, str) else ""
+        self._pending[(event.connection_id, event.request_id)] = (
+            current_stats.get(), f"{event.database_name}.{collection}".rstrip(".")
+        )
+
+    def _finished(self, event, failed: bool):
+        stats, namespace = self._pending.pop((event.connection_id, event.request_id), (None, ""))
+        duration_ms = event.duration_micros / 1000
+        if stats is not None:
+            stats.db_time += duration_ms / 1000
+            stats.db_ops += 1
+        if duration_ms >= self.slow_threshold_ms:
+            logger.warning(
+                f"Slow MongoDB command {event.command_name} on {namespace}: {duration_ms:.1f}ms"
+                f"{' (failed)' if failed else ''}"
+                f"{f' during {stats.path}' if stats is not None else ''}"
+            )
+
+    def succeeded(self, event):
+        self._finished(event, failed=False)
+
+    def failed(self, event):
+        self._finished(event, failed=True)
+
+
+class TimedRoute(APIRoute):
+    """API route that records endpoint and total handler time for Server-Timing"""
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        if asyncio.iscoroutinefunction(endpoint):
+            endpoint = self._time_endpoint(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+    @staticmethod
+    def _time_endpoint(endpoint: Callable) -> Callable:
+        @functools.wraps(endpoint)
+        async def timed_endpoint(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                stats = current_stats.get()
+                if stats is not None:
+                    stats.endpoint_time += time.perf_counter() - started
+        return timed_endpoint
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def timed_handler(request):
+            started = time.perf_counter()
+            try:
+                return await handler(request)
+            finally:
+                stats = current_stats.get()
+                if stats is not None:
+                    stats.route_time += time.perf_counter() - started
+        return timed_handler
+
+
+class StackSampler:
+    """Sample the event loop thread's stack on a background thread while a request runs"""
+
+    def __init__(self, thread_id: int, interval: float = 0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{frame.f_lineno})")
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+
+class ServerTimingMiddleware:
+    """Add a Server-Timing header to API responses and optionally profile sampled slow requests"""
+
+    def __init__(
+        self,
+        app,
+        path_prefix: str = "/api",
+        profile_sample_rate: float = 0.0,
+        profile_threshold_ms: float = 500.0,
+        profile_dir: Optional[Path] = None,
+    ):
+        self.app = app
+        self.path_prefix = path_prefix
+        self.profile_sample_rate = profile_sample_rate
+        self.profile_threshold_ms = profile_threshold_ms
+        self.profile_dir = Path(profile_dir) if profile_dir else None
+        self._sampling = False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefix):
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(scope["path"])
+        token = current_stats.set(stats)
+        started = time.perf_counter()
+
+        # Only one request is sampled at a time: samples see whatever the loop is running
+        sampler = None
+        if self.profile_dir and not self._sampling and random.random() < self.profile_sample_rate:
+            self._sampling = True
+            sampler = StackSampler(threading.get_ident())
+            sampler.start()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                total = time.perf_counter() - started
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", stats.server_timing(total).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_stats.reset(token)
+            if sampler is not None:
+                sampler.stop()
+                self._sampling = False
+                self._dump_profile(stats, time.perf_counter() - started, sampler.samples)
+
+    def _dump_profile(self, stats: RequestStats, total: float, samples: Counter):
+        """Write folded stacks (flamegraph.pl / speedscope format) for a slow request"""
+        total_ms = total * 1000
+        if total_ms < self.profile_threshold_ms or not samples:
+            return
+        try:
+            self.profile_dir.mkdir(parents=True, exist_ok=True)
+            name = stats.path.strip("/").replace("/", "_") or "root"
+            path = self.profile_dir / f"{datetime.utcnow():%Y%m%dT%H%M%S%f}-{name}-{total_ms:.0f}ms.folded"
+            with open(path, "w", encoding="utf-8") as f:
+                for stack, count in samples.most_common():
+                    f.write(f"{stack} {count}\n")
+            logger.info(f"Profiled slow request {stats.path} ({total_ms:.0f}ms, db {stats.db_ops} ops): {path}")
+        except OSError as e:
+            logger.error(f"Failed to write profile for {stats.path}: {e}")
@@ -0,0 +1,132 @@
+from array import array
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+# Statuses are stored as one byte per probe; index into this tuple
+STATUSES = ("online", "degraded", "offline")
+
+
+class ProbeRingBuffer:
+    """Fixed-capacity ring of the most recent probes of one target, held in typed arrays"""
+
+    __slots__ = ("capacity", "_times", "_latencies", "_codes", "_statuses", "_next", "_count")
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._times = array("d", [0.0]) * capacity    # epoch seconds (UTC)
+        self._latencies = array("i", [0]) * capacity  # milliseconds
+        self._codes = array("H", [0]) * capacity      # HTTP status codes
+        self._statuses = array("B", [0]) * capacity   # index into STATUSES
+        self._next = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the underlying arrays"""
+        return sum(
+            column.itemsize * len(column)
+            for column in (self._times, self._latencies, self._codes, self._statuses)
+        )
+
+    def append(self, checked_at: datetime, status: str, response_time: int, status_code: int):
+        """Record a probe, overwriting the oldest one once the buffer is full"""
+        i = self._next
+        self._times[i] = checked_at.replace(tzinfo=timezone.utc).timestamp()
+        self._latencies[i] = response_time
+        self._codes[i] = status_code
+        self._statuses[i] = STATUSES.index(status) if status in STATUSES else STATUSES.index("offline")
+        self._next = (i + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def copy(self) -> "ProbeRingBuffer":
+        """Return an independent copy; copying the arrays is cheap enough for the probe loop"""
+        clone = ProbeRingBuffer.__new__(ProbeRingBuffer)
+        clone.capacity = self.capacity
+        clone._times = self._times[:]
+        clone._latencies = self._latencies[:]
+        clone._codes = self._codes[:]
+        clone._statuses = self._statuses[:]
+        clone._next = self._next
+        clone._count = self._count
+        return clone
+
+    def latest(self, limit: Optional[int] = None) -> List[Dict]:
+        """Return up to limit most recent probes, oldest first"""
+        count = self._count if limit is None else max(0, min(limit, self._count))
+        start = (self._next - count) % self.capacity
+        results = []
+        for offset in range(count):
+            i = (start + offset) % self.capacity
+            results.append({
+                "checkedAt": datetime.utcfromtimestamp(self._times[i]),
+                "status": STATUSES[self._statuses[i]],
+                "responseTime": self._latencies[i],
+                "statusCode": self._codes[i]
+            })
+        return results
+
+    def columns(self) -> Dict:
+        """Return all held probes as per-field lists, oldest first, for publishing in a snapshot"""
+        start = (self._next - self._count) % self.capacity
+        if start + self._count <= self.capacity:
+            order = [slice(start, start + self._count)]
+        else:
+            order = [slice(start, self.capacity), slice(0, self._next)]
+        return {
+            "capacity": self.capacity,
+            "memoryBytes": self.nbytes,
+            "checkedAt": [t for part in order for t in self._times[part]],
+            "status": [STATUSES[s] for part in order for s in self._statuses[part]],
+            "responseTime": [v for part in order for v in self._latencies[part]],
+            "statusCode": [c for part in order for c in self._codes[part]],
+        }
+
+
+def rows_from_columns(columns: Dict, limit: Optional[int] = None) -> List[Dict]:
+    """Turn published columns back into the records ProbeRingBuffer.latest returns"""
+    count = len(columns["checkedAt"])
+    start = count - (count if limit is None else max(0, min(limit, count)))
+    return [
+        {
+            "checkedAt": datetime.utcfromtimestamp(columns["checkedAt"][i]),
+            "status": columns["status"][i],
+            "responseTime": columns["responseTime"][i],
+            "statusCode": columns["statusCode"][i]
+        }
+        for i in range(start, count)
+    ]
+
+
+class RecentResults:
+    """Per-target ring buffers of recent probe results, filled by the probe loop"""
+
+    def __init__(self, capacity: int = 120):
+        self.capacity = capacity
+        self.buffers: Dict[str, ProbeRingBuffer] = {}
+
+    def record(self, website: str, checked_at: datetime, status: str, response_time: int, status_code: int):
+        buffer = self.buffers.get(website)
+        if buffer is None:
+            buffer = self.buffers[website] = ProbeRingBuffer(self.capacity)
+        buffer.append(checked_at, status, response_time, status_code)
+
+    def get(self, website: str) -> Optional[ProbeRingBuffer]:
+        return self.buffers.get(website)
+
+    def copy(self) -> "RecentResults":
+        clone = RecentResults(self.capacity)
+        clone.buffers = {website: buffer.copy() for website, buffer in self.buffers.items()}
+        return clone
+
+    def columns(self) -> Dict[str, Dict]:
+        return {website: buffer.columns() for website, buffer in self.buffers.items()}
+
+    def forget(self, website: str):
+        self.buffers.pop(website, None)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(buffer.nbytes for buffer in self.buffers.values())
@@ -0,0 +1,212 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+LATENCY_PERCENTILES = [50, 90, 95, 99]
+
+
+def month_bounds(period: str) -> Tuple[datetime, datetime]:
+    """Return [start, end) for a YYYY-MM period"""
+    start = datetime.strptime(period, "%Y-%m")
+    if start.month == 12:
+        end = start.replace(year=start.year + 1, month=1)
+    else:
+        end = start.replace(month=start.month + 1)
+    return start, end
+
+
+def compute_sla(
+    checked_at: np.ndarray,
+    online: np.ndarray,
+    response_times: np.ndarray,
+    end: datetime,
+    slo: float,
+) -> Dict:
+    """Compute SLA metrics for one website from time-sorted columnar check data"""
+    total = len(checked_at)
+    if total == 0:
+        return {
+            "checks": 0,
+            "availability": None,
+            "incidents": 0,
+            "downtimeSeconds": 0.0,
+            "mttrSeconds": None,
+            "mtbfSeconds": None,
+            "latency": None,
+            "errorBudget": {"slo": slo, "burn": None, "remaining": None},
+        }
+
+    # Seconds since epoch as float64 so intervals are plain subtractions
+    ts = checked_at.astype("datetime64[ms]").astype(np.int64) / 1000.0
+    end_ts = np.datetime64(end, "ms").astype(np.int64) / 1000.0
+    down = ~online
+
+    # An incident starts on a failed check following a passing one (or at the
+    # first check) and ends on the next passing check, or at the period end
+    previous_online = np.r_[True, online[:-1]]
+    previous_down = np.r_[False, down[:-1]]
+    incident_starts = ts[down & previous_online]
+    recoveries = ts[online & previous_down]
+    incident_ends = np.r_[recoveries, end_ts][:len(incident_starts)]
+
+    incidents = len(incident_starts)
+    downtime = float(np.sum(incident_ends - incident_starts))
+    observed = max(end_ts - ts[0], 0.0)
+    uptime = max(observed - downtime, 0.0)
+
+    availability = float(np.count_nonzero(online)) / total * 100
+    budget = 100.0 - slo
+    burn = (100.0 - availability) / budget if budget > 0 else None
+
+    latency = None
+    online_times = response_times[online]
+    if len(online_times):
+        percentiles = np.percentile(online_times, LATENCY_PERCENTILES)
+        latency = {f"p{p}": round(float(v), 1) for p, v in zip(LATENCY_PERCENTILES, percentiles)}
+        latency["mean"] = round(float(online_times.mean()), 1)
+        latency["max"] = int(online_times.max())
+
+    return {
+        "checks": total,
+        "availability": round(availability, 3),
+        "incidents": incidents,
+        "downtimeSeconds": round(downtime, 1),
+        "mttrSeconds": round(downtime / incidents, 1) if incidents else None,
+        "mtbfSeconds": round(uptime / incidents, 1) if incidents else None,
+        "latency": latency,
+        "errorBudget": {
+            "slo": slo,
+            "burn": round(burn, 3) if burn is not None else None,
+            "remaining": round(max(0.0, 1.0 - burn), 3) if burn is not None else None,
+        },
+    }
+
+
+class SLAReporter:
+    """Build per-website SLA reports, caching reports for periods that ended at least cache_grace ago"""
+
+    def __init__(self, db: AsyncIOMotorDatabase, cache_grace: timedelta = timedelta(days=1)):
+        self.db = db
+        # Spill replay and agent backfill deliver late checks; periods this recent are never cached
+        self.cache_grace = cache_grace
+        self._indexed = False
+
+    async def _ensure_index(self):
+        if not self._indexed:
+            await self.db.sla_reports.create_index(
+                [("website", 1), ("start", 1), ("end", 1), ("slo", 1)], unique=True
+            )
+            self._indexed = True
+
+    async def invalidate(self, results: Iterable[Dict]):
+        """Drop cached reports whose period covers any of these late-arriving results"""
+        earliest: Dict[str, datetime] = {}
+        for result in results:
+            website, checked_at = result["website"], result["checkedAt"]
+            if website not in earliest or checked_at < earliest[website]:
+                earliest[website] = checked_at
+
+        cutoff = datetime.utcnow() - self.cache_grace
+        for website, checked_at in earliest.items():
+            if checked_at >= cutoff:
+                continue  # no cached period can contain it yet
+            deleted = await self.db.sla_reports.delete_many({
+                "website": website, "start": {"$lte": checked_at}, "end": {"$gt": checked_at}
+            })
+            if deleted.deleted_count:
+                logger.info(f"Invalidated {deleted.deleted_count} cached SLA reports for {website}")
+
+    async def _load_columns(
+        self, websites: List[str], start: datetime, end: datetime
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Load check history for websites into columnar arrays sorted by website and time"""
+        names, checked_at, online, response_times = [], [], [], []
+
+        cursor = self.db.website_status.find(
+            {"website": {"$in": websites}, "checkedAt": {"$gte": start, "$lt": end}},
+            {"_id": 0, "website": 1, "checkedAt": 1, "status": 1, "responseTime": 1},
+        ).sort([("website", 1), ("checkedAt", 1)]).batch_size(5000)
+
+        async for doc in cursor:
+            names.append(doc["website"])
+            checked_at.append(doc["checkedAt"])
+            online.append(doc["status"] == "online")
+            response_times.append(doc["responseTime"])
+
+        names = np.array(names, dtype=object)
+        # Boundaries between consecutive websites in the sorted columns
+        site_names, site_starts = np.unique(names, return_index=True) if len(names) else ([], [])
+        return (
+            np.asarray(site_names, dtype=object),
+            np.asarray(site_starts, dtype=np.int64),
+            np.array(checked_at, dtype="datetime64[ms]"),
+            np.array(online, dtype=bool),
+            np.array(response_times, dtype=np.int64),
+        )
+
+    async def build_report(
+        self,
+        start: datetime,
+        end: datetime,
+        websites: Optional[List[str]] = None,
+        slo: float = 99.9,
+    ) -> Dict[str, Dict]:
+        """Get SLA reports for websites over [start, end), all websites with data by default"""
+        if websites is None:
+            websites = await self.db.website_status.distinct(
+                "website", {"checkedAt": {"$gte": start, "$lt": end}}
+            )
+
+        cacheable = end <= datetime.utcnow() - self.cache_grace
+        reports = {}
+
+        if cacheable:
+            async for cached in self.db.sla_reports.find(
+                {"website": {"$in": websites}, "start": start, "end": end, "slo": slo}
+            ):
+                reports[cached["website"]] = cached["report"]
+
+        pending = [website for website in websites if website not in reports]
+        if not pending:
+            return reports
+
+        site_names, site_starts, checked_at, online, response_times = await self._load_columns(
+            pending, start, end
+        )
+        site_ends = np.r_[site_starts[1:], len(checked_at)]
+        computed = {}
+        for name, lo, hi in zip(site_names, site_starts, site_ends):
+            computed[name] = compute_sla(
+                checked_at[lo:hi], online[lo:hi], response_times[lo:hi], end, slo
+            )
+        empty = np.array([], dtype="datetime64[ms]")
+        for website in pending:
+            if website not in computed:
+                computed[website] = compute_sla(
+                    empty, np.array([], dtype=bool), np.array([], dtype=np.int64), end, slo
+                )
+
+        if cacheable:
+            # Upsert so concurrent requests for the same period leave one cached report each;
+            # caching is best effort and never fails the report itself
+            try:
+                await self._ensure_index()
+                await self.db.sla_reports.bulk_write([
+                    UpdateOne(
+                        {"website": website, "start": start, "end": end, "slo": slo},
+                        {"$set": {"report": report, "createdAt": datetime.utcnow()}},
+                        upsert=True
+                    )
+                    for website, report in computed.items()
+                ], ordered=False)
+                logger.info(f"Cached SLA reports for {len(computed)} websites")
+            except Exception as e:
+                logger.warning(f"Failed to cache SLA reports: {e}")
+
+        reports.update(computed)
+        return reports
@@ -0,0 +1,32 @@
+import gzip
+import time
+from typing import Any
+import brotli
+import orjson
+from fastapi import Request, Response
+from profiling import record_serialization
+
+# Payloads smaller than this are cheaper to send as-is than to compress
+COMPRESSION_MIN_SIZE = 1024
+
+
+def compressed_json_response(request: Request, content: Any, min_size: int = COMPRESSION_MIN_SIZE) -> Response:
+    """Serialize content with orjson and compress it with brotli or gzip when the client accepts it"""
+    started = time.perf_counter()
+    body = orjson.dumps(content)
+    headers = {"Vary": "Accept-Encoding"}
+
+    if len(body) >= min_size:
+        accepted = {
+            part.split(";")[0].strip()
+            for part in request.headers.get("accept-encoding", "").split(",")
+        }
+        if "br" in accepted:
+            body = brotli.compress(body, quality=4)
+            headers["Content-Encoding"] = "br"
+        elif "gzip" in accepted:
+            body = gzip.compress(body, compresslevel=6)
+            headers["Content-Encoding"] = "gzip"
+    record_serialization(time.perf_counter() - started)
+
+    return Response(content=body, media_type="application/json", headers=headers)
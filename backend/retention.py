@@ -0,0 +1,175 @@
+import asyncio
+import gzip
+import json
+import logging
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from motor.motor_asyncio import AsyncIOMotorCollection, AsyncIOMotorDatabase
+
+logger = logging.getLogger(__name__)
+
+
+def _json_default(value: Any) -> str:
+    """Serialize datetimes and ObjectIds for NDJSON archives"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+class RetentionJob:
+    """Archive and delete expired monitoring data in paced, bounded batches"""
+
+    collections = ["website_status", "uptime_history"]
+
+    def __init__(
+        self,
+        db: AsyncIOMotorDatabase,
+        archive_dir: Path,
+        retention_days: int = 30,
+        batch_size: int = 1000,
+        pause: float = 0.2,
+        progress_store: Optional[AsyncIOMotorCollection] = None,
+    ):
+        self.db = db
+        self.archive_dir = Path(archive_dir)
+        self.retention_days = retention_days
+        self.batch_size = batch_size
+        self.pause = pause
+        self.task: Optional[asyncio.Task] = None
+        self.progress: Dict[str, Any] = {"state": "idle"}
+        # Progress is mirrored here so workers that do not run the job can report and request it
+        self.progress_store = progress_store
+
+    @property
+    def running(self) -> bool:
+        return self.task is not None and not self.task.done()
+
+    def start(self) -> bool:
+        """Start the retention job in the background, unless it is already running"""
+        if self.running:
+            return False
+
+        cutoff = datetime.utcnow() - timedelta(days=self.retention_days)
+        self.progress = {
+            "state": "running",
+            "cutoff": cutoff,
+            "startedAt": datetime.utcnow(),
+            "finishedAt": None,
+            "error": None,
+            "collections": {
+                name: {"archived": 0, "deleted": 0, "archive": None}
+                for name in self.collections
+            },
+        }
+        self.task = asyncio.create_task(self.run(cutoff))
+        return True
+
+    async def stop(self):
+        """Cancel a running retention job"""
+        if self.running:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+
+    async def save_progress(self):
+        """Mirror progress to the progress store; failures only cost progress visibility"""
+        if self.progress_store is None:
+            return
+        try:
+            # $set rather than replace, so a pending request from another worker survives
+            await self.progress_store.update_one({"_id": "retention"}, {"$set": self.progress}, upsert=True)
+        except Exception as e:
+            logger.warning(f"Failed to save retention progress: {e}")
+
+    async def load_progress(self) -> Dict[str, Any]:
+        """Read the progress last saved by whichever process ran the job"""
+        if self.progress_store is None:
+            return self.progress
+        saved = await self.progress_store.find_one({"_id": "retention"}, {"_id": 0})
+        return saved or {"state": "idle"}
+
+    async def request(self):
+        """Ask the process that runs the job to start it"""
+        await self.progress_store.update_one(
+            {"_id": "retention"},
+            {"$set": {"state": "requested", "requested": True, "requestedAt": datetime.utcnow()}},
+            upsert=True
+        )
+
+    async def take_request(self) -> bool:
+        """Start the job if another worker requested it; return whether it started"""
+        if self.progress_store is None:
+            return False
+        request = await self.progress_store.find_one_and_update(
+            {"_id": "retention", "requested": True},
+            {"$set": {"requested": False}}
+        )
+        return request is not None and self.start()
+
+    async def run(self, cutoff: datetime):
+        """Archive and delete every collection's records older than cutoff"""
+        try:
+            await self.save_progress()
+            for name in self.collections:
+                await self._cleanup_collection(name, cutoff)
+            self.progress["state"] = "completed"
+        except asyncio.CancelledError:
+            self.progress["state"] = "cancelled"
+            raise
+        except Exception as e:
+            logger.error(f"Error in retention job: {e}")
+            self.progress["state"] = "failed"
+            self.progress["error"] = str(e)
+        finally:
+            self.progress["finishedAt"] = datetime.utcnow()
+            await self.save_progress()
+
+    async def _cleanup_collection(self, name: str, cutoff: datetime):
+        """Move expired records of one collection to a gzip NDJSON archive, batch by batch"""
+        collection = self.db[name]
+        stats = self.progress["collections"][name]
+        archive_path = self.archive_dir / f"{name}-{cutoff:%Y%m%dT%H%M%S}.ndjson.gz"
+        archive = None
+
+        # Lets every batch query walk the index instead of scanning the collection
+        await collection.create_index("createdAt")
+
+        try:
+            while True:
+                batch = await collection.find(
+                    {"createdAt": {"$lt": cutoff}}
+                ).sort("createdAt", 1).limit(self.batch_size).to_list(self.batch_size)
+
+                if not batch:
+                    break
+
+                if archive is None:
+                    self.archive_dir.mkdir(parents=True, exist_ok=True)
+                    archive = gzip.open(archive_path, "at", encoding="utf-8")
+                    stats["archive"] = str(archive_path)
+
+                # Records are only deleted once they are flushed to the archive
+                await asyncio.to_thread(self._write_batch, archive, batch)
+                stats["archived"] += len(batch)
+
+                result = await collection.delete_many(
+                    {"_id": {"$in": [doc["_id"] for doc in batch]}}
+                )
+                stats["deleted"] += result.deleted_count
+                await self.save_progress()
+
+                await asyncio.sleep(self.pause)
+        finally:
+            if archive is not None:
+                archive.close()
+
+        logger.info(f"Cleaned up {stats['deleted']} old {name} records")
+
+    @staticmethod
+    def _write_batch(archive, batch: List[Dict]):
+        for doc in batch:
+            archive.write(json.dumps(doc, default=_json_default) + "\n")
+        archive.flush()
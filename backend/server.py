@@ -1,4 +1,6 @@
-from fastapi import FastAPI, APIRouter, HTTPException, BackgroundTasks
+from fastapi import FastAPI, APIRouter, HTTPException, BackgroundTasks, Request
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
@@ -7,44 +9,156 @@ import logging
 from pathlib import Path
 from models import (
     WebsiteStatusOverview, WebsiteStatusResponse, UptimeResponse,
-    WebsiteStatus, UptimeHistory
+    WebsiteStatus, UptimeHistory, IngestBatch
 )
 from website_monitor import WebsiteMonitor
+from persistence import ResultWriter, insert_new
+from targets import TargetRegistry
+from ingest import MAX_INGEST_BYTES, authenticate_agent, decode_body, parse_agent_tokens, read_limited
+from profiling import CommandMonitor, ServerTimingMiddleware, TimedRoute
+from snapshot import SnapshotPublisher, SnapshotReader, claim_monitor_role
+from anomaly import LatencyDetector
+from responses import compressed_json_response
+from retention import RetentionJob
+from export import EXPORT_FORMATS, iter_status_export, to_naive_utc
+from reporting import SLAReporter, month_bounds
+from recent_results import rows_from_columns
 import asyncio
-from datetime import datetime
-from typing import Dict, Any
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
+# MongoDB connection, with command monitoring feeding Server-Timing and the slow-command log
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+command_monitor = CommandMonitor(slow_threshold_ms=float(os.environ.get('SLOW_COMMAND_MS', 100)))
+client = AsyncIOMotorClient(mongo_url, event_listeners=[command_monitor])
 db = client[os.environ['DB_NAME']]
 
+# With several workers only one runs the monitor (RUN_MONITOR=auto elects it with a file lock);
+# the others serve status reads from the snapshot it publishes
+RUNTIME_DIR = Path(os.environ.get('RUNTIME_DIR', ROOT_DIR / 'run'))
+run_monitor = os.environ.get('RUN_MONITOR', 'auto')
+monitor_lock = claim_monitor_role(RUNTIME_DIR / 'monitor.lock') if run_monitor == 'auto' else None
+is_monitor = run_monitor == '1' or monitor_lock is not None
+
+status_snapshot = SnapshotReader(
+    RUNTIME_DIR / 'status-snapshot.json',
+    max_age=float(os.environ.get('SNAPSHOT_MAX_AGE', 300))
+)
+recent_snapshot = SnapshotReader(
+    RUNTIME_DIR / 'recent-snapshot.json',
+    max_age=float(os.environ.get('SNAPSHOT_MAX_AGE', 300))
+)
+
+# Initialize SLA reporter; reports are cached once their period ended REPORT_CACHE_GRACE_HOURS ago
+sla_reporter = SLAReporter(
+    db,
+    cache_grace=timedelta(hours=float(os.environ.get('REPORT_CACHE_GRACE_HOURS', 24)))
+)
+
+# Initialize result writer (spills to disk while MongoDB is slow or down); the spill
+# file belongs to the monitor process, other workers drop results they cannot write
+result_writer = ResultWriter(
+    db.website_status,
+    spill_path=Path(os.environ.get('SPOOL_DIR', ROOT_DIR / 'spool')) / 'website_status.ndjson' if is_monitor else None,
+    max_queue=int(os.environ.get('RESULT_QUEUE_SIZE', 1000)),
+    on_replay=sla_reporter.invalidate
+)
+
+# Initialize target registry from a JSON file, or the targets collection when TARGETS_SOURCE=mongo
+if os.environ.get('TARGETS_SOURCE', 'file') == 'mongo':
+    target_registry = TargetRegistry(collection=db.targets)
+else:
+    target_registry = TargetRegistry(path=Path(os.environ.get('TARGETS_FILE', ROOT_DIR / 'targets.json')))
+
 # Initialize website monitor
-website_monitor = WebsiteMonitor(db)
+website_monitor = WebsiteMonitor(
+    db,
+    result_writer,
+    target_registry,
+    recent_capacity=int(os.environ.get('RECENT_CAPACITY', 120)),
+    max_concurrency=int(os.environ.get('PROBE_CONCURRENCY', 50)),
+    region=os.environ.get('PROBE_REGION'),
+    snapshot=SnapshotPublisher(RUNTIME_DIR / 'status-snapshot.json') if is_monitor else None,
+    recent_snapshot=SnapshotPublisher(RUNTIME_DIR / 'recent-snapshot.json') if is_monitor else None,
+    recent_publish_interval=float(os.environ.get('RECENT_PUBLISH_INTERVAL', 10)),
+    detector=LatencyDetector(
+        threshold=float(os.environ.get('ANOMALY_THRESHOLD', 4.0)),
+        sustain=int(os.environ.get('ANOMALY_SUSTAIN', 3)),
+        seasonal=os.environ.get('ANOMALY_SEASONAL', '0') == '1'
+    )
+)
+
+# Probe agent credentials, as "agent-id=token" pairs
+agent_tokens = parse_agent_tokens(os.environ.get('INGEST_TOKENS', ''))
+MAX_INGEST_RESULTS = int(os.environ.get('MAX_INGEST_RESULTS', 5000))
+
+# Initialize retention job (archives expired data before deleting it); only the monitor process runs it
+retention_job = RetentionJob(
+    db,
+    archive_dir=Path(os.environ.get('ARCHIVE_DIR', ROOT_DIR / 'archive')),
+    retention_days=int(os.environ.get('RETENTION_DAYS', 30)),
+    batch_size=int(os.environ.get('RETENTION_BATCH_SIZE', 1000)),
+    pause=float(os.environ.get('RETENTION_PAUSE', 0.2)),
+    progress_store=db.job_progress
+)
 
 # Create the main app without a prefix
 app = FastAPI()
 
 # Create a router with the /api prefix
-api_router = APIRouter(prefix="/api")
+api_router = APIRouter(prefix="/api", route_class=TimedRoute)
 
-# Background monitoring task
+# Background monitoring and persistence tasks
 monitoring_task = None
+writer_task = None
+registry_task = None
+requests_task = None
+
+# How often the monitor process looks for work requested by other workers
+REQUEST_POLL_INTERVAL = float(os.environ.get('REQUEST_POLL_INTERVAL', 5))
+
+async def watch_monitor_requests():
+    """Run cleanups and forced status checks that other workers requested through the job_progress collection"""
+    while True:
+        try:
+            if await retention_job.take_request():
+                logging.info("Started old data cleanup requested by another worker")
+            request = await db.job_progress.find_one_and_update(
+                {"_id": "status_check", "requested": True},
+                {"$set": {"requested": False}}
+            )
+            if request:
+                await website_monitor.check_all_websites()
+        except Exception as e:
+            logging.error(f"Error polling monitor requests: {e}")
+        await asyncio.sleep(REQUEST_POLL_INTERVAL)
 
 @app.on_event("startup")
 async def startup_event():
     """Start background monitoring when server starts"""
-    global monitoring_task
-    logging.info("Starting website monitoring background task...")
-    monitoring_task = asyncio.create_task(website_monitor.start_monitoring())
+    global monitoring_task, writer_task, registry_task, requests_task
+    await target_registry.refresh()
+    logging.info("Starting result writer background task...")
+    writer_task = asyncio.create_task(result_writer.run())
+    if is_monitor:
+        logging.info("Starting website monitoring background task...")
+        monitoring_task = asyncio.create_task(website_monitor.start_monitoring())
+        requests_task = asyncio.create_task(watch_monitor_requests())
+    else:
+        logging.info("Another worker runs website monitoring; serving status from its snapshot")
+        registry_task = asyncio.create_task(target_registry.watch())
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Stop background monitoring when server shuts down"""
-    global monitoring_task
+    global monitoring_task, writer_task, registry_task, requests_task
+    if registry_task:
+        registry_task.cancel()
+    if requests_task:
+        requests_task.cancel()
     if monitoring_task:
         website_monitor.stop_monitoring()
         monitoring_task.cancel()
@@ -52,50 +166,104 @@ async def shutdown_event():
             await monitoring_task
         except asyncio.CancelledError:
             pass
+    if writer_task:
+        writer_task.cancel()
+        try:
+            await writer_task
+        except asyncio.CancelledError:
+            pass
+        result_writer.stop()
+    await retention_job.stop()
     client.close()
 
 # Website Status Monitoring Endpoints
+WEBSITE_FIELDS = [
+    "website", "status", "responseTime", "lastChecked", "statusCode", "degradedReason", "anomalyScore"
+]
+DASHBOARD_SECTIONS = ["websites", "uptime"]
+
+def build_website_status(websites_data: Dict[str, Dict], fields: List[str] = WEBSITE_FIELDS) -> Dict[str, Any]:
+    """Convert monitor results to the website status response format"""
+    websites_response = {}
+    for website_name, data in websites_data.items():
+        record = {"website": website_name, **data}
+        websites_response[website_name] = {field: record.get(field) for field in fields}
+
+    return {
+        "websites": websites_response,
+        "overall": website_monitor.calculate_overall_status(websites_data),
+        "lastUpdated": datetime.utcnow()
+    }
+
+def parse_selection(value: Optional[str], allowed: List[str], name: str) -> List[str]:
+    """Parse a comma-separated selection query parameter"""
+    if not value:
+        return allowed
+    selected = [item.strip() for item in value.split(",") if item.strip()]
+    unknown = [item for item in selected if item not in allowed]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown {name}: {', '.join(unknown)}")
+    return selected
+
+async def load_latest_status() -> Dict[str, Dict]:
+    """Get latest status per website from the monitor's snapshot, or the database without one"""
+    snapshot = status_snapshot.get()
+    if snapshot is not None:
+        return snapshot["websites"]
+    return await website_monitor.get_latest_status()
+
+async def load_uptime_history() -> List[Dict]:
+    """Get 24-hour uptime from the monitor's snapshot, or the database without one"""
+    snapshot = status_snapshot.get()
+    if snapshot is not None and snapshot["uptime"]:
+        return snapshot["uptime"]
+    return await website_monitor.calculate_uptime_history()
+
 @api_router.get("/status/websites")
 async def get_all_website_status():
     """Get current status of all monitored websites"""
     try:
-        websites_data = await website_monitor.get_latest_status()
-        overall = website_monitor.calculate_overall_status(websites_data)
-        
-        # Convert to proper response format
-        websites_response = {}
-        for website_name, data in websites_data.items():
-            websites_response[website_name] = {
-                "website": website_name,
-                "status": data["status"],
-                "responseTime": data["responseTime"],
-                "lastChecked": data["lastChecked"],
-                "statusCode": data["statusCode"]
-            }
-        
-        return {
-            "websites": websites_response,
-            "overall": overall,
-            "lastUpdated": datetime.utcnow()
-        }
+        websites_data = await load_latest_status()
+        return build_website_status(websites_data)
     except Exception as e:
         logging.error(f"Error getting website status: {e}")
         raise HTTPException(status_code=500, detail="Failed to get website status")
 
+@api_router.get("/status/dashboard")
+async def get_dashboard(request: Request, include: Optional[str] = None, fields: Optional[str] = None):
+    """Get website status and 24-hour uptime in one compressed response"""
+    sections = parse_selection(include, DASHBOARD_SECTIONS, "section")
+    website_fields = parse_selection(fields, WEBSITE_FIELDS, "field")
+
+    try:
+        loaders = {
+            "websites": load_latest_status,
+            "uptime": load_uptime_history
+        }
+        results = dict(zip(sections, await asyncio.gather(*(loaders[section]() for section in sections))))
+
+        payload = {}
+        if "websites" in results:
+            payload.update(build_website_status(results["websites"], website_fields))
+        if "uptime" in results:
+            payload["uptime"] = results["uptime"]
+
+        return compressed_json_response(request, payload)
+    except Exception as e:
+        logging.error(f"Error getting dashboard data: {e}")
+        raise HTTPException(status_code=500, detail="Failed to get dashboard data")
+
 @api_router.get("/status/websites/{website}", response_model=WebsiteStatusResponse)
-async def get_website_status(website: str):
-    """Get detailed status for a specific website"""
+async def get_website_status(website: str, region: Optional[str] = None):
+    """Get detailed status for a specific website, as seen from one probe region if given"""
     try:
         # Validate website parameter
-        valid_websites = ["loyalhood.xyz", "host.loyalhood.xyz", "pm.loyalhood.xyz"]
-        if website not in valid_websites:
+        if website not in target_registry:
             raise HTTPException(status_code=404, detail="Website not found")
         
-        # Get latest status from database
-        latest = await db.website_status.find_one(
-            {"website": website},
-            sort=[("checkedAt", -1)]
-        )
+        # Get latest status from database; without a region, only this host's checks, as in /status/websites
+        query = {"website": website, "region": region} if region else {"website": website, "agent": None}
+        latest = await db.website_status.find_one(query, sort=[("checkedAt", -1)])
         
         if not latest:
             raise HTTPException(status_code=404, detail="No status data found for website")
@@ -105,7 +273,9 @@ async def get_website_status(website: str):
             status=latest["status"],
             responseTime=latest["responseTime"],
             lastChecked=latest["checkedAt"],
-            statusCode=latest["statusCode"]
+            statusCode=latest["statusCode"],
+            degradedReason=latest.get("degradedReason"),
+            anomalyScore=latest.get("anomalyScore")
         )
     except HTTPException:
         raise
@@ -113,36 +283,213 @@ async def get_website_status(website: str):
         logging.error(f"Error getting status for {website}: {e}")
         raise HTTPException(status_code=500, detail="Failed to get website status")
 
+@api_router.get("/status/recent/{website}")
+async def get_recent_checks(website: str, limit: Optional[int] = None):
+    """Get the most recent checks for a website from memory, oldest first"""
+    # Only the monitor process probes on schedule, so only its rings are current
+    buffer = website_monitor.recent.get(website) if is_monitor else None
+    if buffer is not None:
+        return {
+            "website": website,
+            "checks": buffer.latest(limit),
+            "capacity": buffer.capacity,
+            "memoryBytes": buffer.nbytes
+        }
+
+    snapshot = recent_snapshot.get()
+    recent = snapshot["recent"].get(website) if snapshot is not None else None
+    if recent is None:
+        raise HTTPException(status_code=404, detail="No recent checks found for website")
+
+    return {
+        "website": website,
+        "checks": rows_from_columns(recent, limit),
+        "capacity": recent["capacity"],
+        "memoryBytes": recent["memoryBytes"]
+    }
+
 @api_router.get("/status/uptime")
-async def get_uptime_data():
-    """Get 24-hour uptime data for visualization"""
+async def get_uptime_data(region: Optional[str] = None):
+    """Get 24-hour uptime data for visualization, optionally for one probe region"""
     try:
-        uptime_data = await website_monitor.calculate_uptime_history()
+        if region:
+            uptime_data = await website_monitor.calculate_uptime_history(region)
+        else:
+            uptime_data = await load_uptime_history()
         return {"uptime": uptime_data}
     except Exception as e:
         logging.error(f"Error getting uptime data: {e}")
         raise HTTPException(status_code=500, detail="Failed to get uptime data")
 
+@api_router.get("/status/export")
+async def export_status_history(
+    website: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    format: str = "ndjson",
+    gzip: bool = False
+):
+    """Stream status history for a website and time range as NDJSON or CSV"""
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported export format: {format}")
+
+    end = to_naive_utc(end) or datetime.utcnow()
+    start = to_naive_utc(start) or end - timedelta(hours=24)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+
+    filename = f"{website}-{start:%Y%m%dT%H%M%S}-{end:%Y%m%dT%H%M%S}.{format}"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+
+    return StreamingResponse(
+        iter_status_export(db, website, start, end, fmt=format, compress=gzip),
+        media_type=EXPORT_FORMATS[format],
+        headers=headers
+    )
+
+@api_router.get("/status/report")
+async def get_sla_report(
+    website: Optional[str] = None,
+    period: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    slo: float = 99.9
+):
+    """Get SLA report (availability, MTTR, MTBF, latency, error budget) per website"""
+    if period:
+        try:
+            start, end = month_bounds(period)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="period must be formatted as YYYY-MM")
+    else:
+        end = to_naive_utc(end) or datetime.utcnow()
+        start = to_naive_utc(start) or end - timedelta(days=30)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    if not 0 < slo < 100:
+        raise HTTPException(status_code=400, detail="slo must be between 0 and 100")
+
+    try:
+        reports = await sla_reporter.build_report(
+            start, end, websites=[website] if website else None, slo=slo
+        )
+        return {"start": start, "end": end, "slo": slo, "reports": reports}
+    except Exception as e:
+        logging.error(f"Error building SLA report: {e}")
+        raise HTTPException(status_code=500, detail="Failed to build SLA report")
+
 @api_router.post("/status/check")
 async def force_status_check(background_tasks: BackgroundTasks):
     """Force an immediate status check of all websites"""
     try:
-        background_tasks.add_task(website_monitor.check_all_websites)
-        return {"message": "Status check initiated"}
+        if is_monitor:
+            background_tasks.add_task(website_monitor.check_all_websites)
+            return {"message": "Status check initiated"}
+        # Results of a check run here would never reach the snapshot, so ask the monitor process
+        await db.job_progress.update_one(
+            {"_id": "status_check"},
+            {"$set": {"requested": True, "requestedAt": datetime.utcnow()}},
+            upsert=True
+        )
+        return {"message": "Status check requested"}
     except Exception as e:
         logging.error(f"Error initiating status check: {e}")
         raise HTTPException(status_code=500, detail="Failed to initiate status check")
 
-@api_router.delete("/status/cleanup")
+@api_router.delete("/status/cleanup", status_code=202)
 async def cleanup_old_data():
-    """Clean up old monitoring data (30+ days)"""
+    """Start archiving and cleaning up old monitoring data (30+ days) in the monitor process"""
     try:
-        await website_monitor.cleanup_old_data()
-        return {"message": "Old data cleanup completed"}
+        if is_monitor:
+            if retention_job.start():
+                message = "Old data cleanup started"
+            else:
+                message = "Old data cleanup already running"
+            return {"message": message, "progress": retention_job.progress}
+
+        # Other workers leave a request that the monitor process picks up
+        progress = await retention_job.load_progress()
+        if progress.get("state") == "running":
+            return {"message": "Old data cleanup already running", "progress": progress}
+        await retention_job.request()
+        return {"message": "Old data cleanup requested", "progress": await retention_job.load_progress()}
     except Exception as e:
         logging.error(f"Error cleaning up old data: {e}")
         raise HTTPException(status_code=500, detail="Failed to cleanup old data")
 
+@api_router.get("/status/cleanup")
+async def get_cleanup_progress():
+    """Get progress of the most recent data cleanup"""
+    if is_monitor:
+        return {"progress": retention_job.progress}
+
+    try:
+        return {"progress": await retention_job.load_progress()}
+    except Exception as e:
+        logging.error(f"Error getting cleanup progress: {e}")
+        raise HTTPException(status_code=500, detail="Failed to get cleanup progress")
+
+@api_router.post("/ingest/results")
+async def ingest_results(request: Request):
+    """Bulk-insert a batch of probe results pushed by a remote probe agent"""
+    agent = authenticate_agent(agent_tokens, request.headers.get("authorization"))
+    if agent is None:
+        raise HTTPException(status_code=401, detail="Invalid agent token")
+
+    # Refuse oversized bodies before reading them; chunked ones are capped while streaming
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > MAX_INGEST_BYTES:
+        raise HTTPException(status_code=413, detail="Batch too large")
+
+    try:
+        body = decode_body(await read_limited(request.stream()), request.headers.get("content-encoding"))
+        batch = IngestBatch.model_validate_json(body)
+    except OverflowError:
+        raise HTTPException(status_code=413, detail="Batch too large")
+    except (ValueError, ValidationError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid batch: {e}")
+
+    if len(batch.results) > MAX_INGEST_RESULTS:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {MAX_INGEST_RESULTS} results")
+
+    # Store results for known websites and report the others instead of failing the whole batch
+    docs, rejected = [], []
+    for index, result in enumerate(batch.results):
+        if result.website not in target_registry:
+            rejected.append({"index": index, "website": result.website, "reason": "unknown website"})
+            continue
+        doc = WebsiteStatus(**result.dict(exclude_none=True), agent=agent, region=batch.region).dict()
+        if result.id:
+            # Keyed by the agent's result id so a retried batch does not store duplicates
+            doc["_id"] = f"{agent}:{result.id}"
+        docs.append(doc)
+    if not docs:
+        return {"inserted": 0, "duplicates": 0, "rejected": rejected}
+
+    try:
+        inserted = await insert_new(db.website_status, docs)
+        await sla_reporter.invalidate(docs)
+        return {"inserted": inserted, "duplicates": len(docs) - inserted, "rejected": rejected}
+    except Exception as e:
+        logging.error(f"Error ingesting results from {agent}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to ingest results")
+
+@api_router.get("/targets")
+async def get_targets():
+    """List monitoring targets and their settings"""
+    return {
+        "version": target_registry.version,
+        "targets": [target.dict() for target in target_registry.targets.values()]
+    }
+
+@api_router.post("/targets/reload")
+async def reload_targets():
+    """Reload monitoring targets from their source without restarting"""
+    changed = await target_registry.load()
+    return {"changed": changed, "version": target_registry.version, "count": len(target_registry)}
+
 # Original endpoints (keep for compatibility)
 @api_router.get("/")
 async def root():
@@ -158,7 +505,12 @@ async def health_check():
             "status": "healthy",
             "timestamp": datetime.utcnow(),
             "database": "connected",
-            "monitoring": "active" if website_monitor.monitoring else "inactive"
+            "monitoring": "active" if website_monitor.monitoring else "inactive",
+            "persistence": {
+                "healthy": result_writer.healthy,
+                "queued": result_writer.queue.qsize(),
+                **result_writer.stats
+            }
         }
     except Exception as e:
         logging.error(f"Health check failed: {e}")
@@ -167,12 +519,21 @@ async def health_check():
 # Include the router in the main app
 app.include_router(api_router)
 
+# Server-Timing on every API response; PROFILE_SAMPLE_RATE > 0 also dumps stacks of slow requests
+app.add_middleware(
+    ServerTimingMiddleware,
+    profile_sample_rate=float(os.environ.get('PROFILE_SAMPLE_RATE', 0)),
+    profile_threshold_ms=float(os.environ.get('PROFILE_THRESHOLD_MS', 500)),
+    profile_dir=Path(os.environ.get('PROFILE_DIR', ROOT_DIR / 'profiles'))
+)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
 # Configure logging
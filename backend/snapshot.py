@@ -0,0 +1,86 @@
+import fcntl
+import logging
+import mmap
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, IO, List, Optional
+import orjson
+
+logger = logging.getLogger(__name__)
+
+
+def claim_monitor_role(lock_path: Path) -> Optional[IO]:
+    """Try to become the single process that runs the monitor; keep the returned file open to hold the role"""
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    lock_file = open(lock_path, "a")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return None
+    return lock_file
+
+
+class SnapshotPublisher:
+    """Publish immutable, versioned status snapshots by atomically replacing a file"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.version = 0
+
+    def publish(self, websites: Dict[str, Dict], overall: str, uptime: List[Dict]):
+        self.write({"websites": websites, "overall": overall, "uptime": uptime})
+
+    def write(self, content: Dict[str, Any]):
+        """Publish content as the next version of the snapshot"""
+        self.version += 1
+        snapshot = {
+            "version": self.version,
+            "pid": os.getpid(),
+            "publishedAt": datetime.utcnow(),
+            **content,
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(orjson.dumps(snapshot))
+        # Readers either see the previous file or this one, never a partial write
+        os.replace(tmp_path, self.path)
+
+
+class SnapshotReader:
+    """Serve the latest published snapshot from a memory map, re-mapping only when a new one appears"""
+
+    def __init__(self, path: Path, max_age: float = 300.0):
+        self.path = Path(path)
+        self.max_age = max_age
+        self._identity = None
+        self._snapshot: Optional[Dict[str, Any]] = None
+
+    def _load(self) -> Optional[Dict[str, Any]]:
+        with open(self.path, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped, memoryview(mapped) as view:
+                return orjson.loads(view)
+
+    def get(self) -> Optional[Dict[str, Any]]:
+        """Return the current snapshot, or None if there is none or its publisher has gone quiet"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+
+        # A new snapshot is a new file, so its inode identifies the version on disk
+        identity = (stat.st_ino, stat.st_mtime_ns)
+        if identity != self._identity:
+            try:
+                self._snapshot = self._load()
+                self._identity = identity
+            except (OSError, ValueError) as e:
+                logger.warning(f"Failed to read status snapshot {self.path}: {e}")
+                return None
+
+        if time.time() - stat.st_mtime > self.max_age:
+            return None
+        return self._snapshot
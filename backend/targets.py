@@ -0,0 +1,104 @@
+import asyncio
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+from motor.motor_asyncio import AsyncIOMotorCollection
+from models import Target
+
+logger = logging.getLogger(__name__)
+
+PROBE_TYPES = ("http", "head")
+
+
+def parse_targets(items: List[Dict]) -> Dict[str, Target]:
+    """Validate raw target definitions and index them by name"""
+    targets = {}
+    for item in items:
+        item = dict(item)
+        item.setdefault("name", urlparse(item.get("url", "")).netloc)
+        target = Target(**item)
+        if target.probeType not in PROBE_TYPES:
+            raise ValueError(f"Unsupported probe type for {target.name}: {target.probeType}")
+        if target.name in targets:
+            raise ValueError(f"Duplicate target name: {target.name}")
+        targets[target.name] = target
+    return targets
+
+
+class TargetRegistry:
+    """Monitoring targets loaded from a JSON file or a MongoDB collection, indexed by name"""
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        collection: Optional[AsyncIOMotorCollection] = None,
+        reload_interval: float = 30.0,
+    ):
+        self.path = Path(path) if path else None
+        self.collection = collection
+        self.reload_interval = reload_interval
+        self.targets: Dict[str, Target] = {}
+        self.version = 0
+        self._source_mtime: Optional[float] = None
+        self._loaded_at = 0.0
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.targets
+
+    def __len__(self) -> int:
+        return len(self.targets)
+
+    def get(self, name: str) -> Optional[Target]:
+        return self.targets.get(name)
+
+    def enabled(self) -> List[Target]:
+        return [target for target in self.targets.values() if target.enabled]
+
+    async def _read_source(self) -> List[Dict]:
+        if self.collection is not None:
+            return await self.collection.find({}, {"_id": 0}).to_list(None)
+        with open(self.path, encoding="utf-8") as f:
+            return json.load(f)
+
+    async def load(self) -> bool:
+        """Reload targets from the source, keeping the current ones if the source is invalid"""
+        self._loaded_at = time.monotonic()
+        try:
+            targets = parse_targets(await self._read_source())
+        except Exception as e:
+            logger.error(f"Failed to load monitoring targets, keeping {len(self.targets)} current ones: {e}")
+            return False
+
+        if targets == self.targets:
+            return False
+
+        self.targets = targets
+        self.version += 1
+        logger.info(f"Loaded {len(targets)} monitoring targets (version {self.version})")
+        return True
+
+    async def refresh(self) -> bool:
+        """Reload if the file changed on disk, or if the collection is due for a re-read"""
+        if self.collection is not None:
+            if time.monotonic() - self._loaded_at < self.reload_interval:
+                return False
+            return await self.load()
+
+        try:
+            mtime = self.path.stat().st_mtime
+        except OSError as e:
+            logger.error(f"Cannot stat targets file {self.path}: {e}")
+            return False
+        if mtime == self._source_mtime:
+            return False
+        self._source_mtime = mtime
+        return await self.load()
+
+    async def watch(self, interval: float = 5.0):
+        """Keep refreshing the registry, for processes that do not run the monitor loop"""
+        while True:
+            await self.refresh()
+            await asyncio.sleep(interval)
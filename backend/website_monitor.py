@@ -2,35 +2,81 @@ import asyncio
 import aiohttp
 import time
 from datetime import datetime, timedelta
-from typing import Dict, Tuple, List
+from typing import Dict, Tuple, List, Optional
 import logging
 from motor.motor_asyncio import AsyncIOMotorDatabase
-from models import WebsiteStatus, UptimeHistory
+from models import WebsiteStatus, UptimeHistory, Target
+from recent_results import RecentResults
+from persistence import ResultWriter
+from targets import TargetRegistry
+from snapshot import SnapshotPublisher
+from anomaly import LatencyDetector
 
 logger = logging.getLogger(__name__)
 
 class WebsiteMonitor:
-    def __init__(self, db: AsyncIOMotorDatabase):
+    def __init__(
+        self,
+        db: AsyncIOMotorDatabase,
+        writer: ResultWriter,
+        registry: TargetRegistry,
+        recent_capacity: int = 120,
+        max_concurrency: int = 50,
+        region: Optional[str] = None,
+        snapshot: Optional[SnapshotPublisher] = None,
+        recent_snapshot: Optional[SnapshotPublisher] = None,
+        uptime_refresh: float = 60.0,
+        uptime_timeout: float = 30.0,
+        detector: Optional[LatencyDetector] = None,
+        publish_interval: float = 1.0,
+        recent_publish_interval: float = 10.0
+    ):
         self.db = db
-        self.websites = [
-            "https://loyalhood.xyz",
-            "https://host.loyalhood.xyz", 
-            "https://pm.loyalhood.xyz"
-        ]
+        self.detector = detector or LatencyDetector()
+        self.region = region
+        self.snapshot = snapshot
+        # Recent-check rings are much larger than the statuses, so they go to their own, less frequent snapshot
+        self.recent_snapshot = recent_snapshot
+        self.recent_publish_interval = recent_publish_interval
+        self.recent_published_at = 0.0
+        self.uptime_refresh = uptime_refresh
+        self.uptime_timeout = uptime_timeout
+        self.publish_interval = publish_interval
+        self.published_at = 0.0
+        self.updated = False
+        # Latest result per target as seen by this process, published in snapshots
+        self.latest: Dict[str, Dict] = {}
+        # Last successfully computed uptime history, refreshed by its own task
+        self.uptime: List[Dict] = []
+        self.writer = writer
+        self.registry = registry
         self.monitoring = False
+        self.recent = RecentResults(recent_capacity)
+        # Monotonic time each target is next due, kept across registry reloads
+        self.next_due: Dict[str, float] = {}
+        # Each due target is probed in its own task so a slow target never holds up the rest
+        self.inflight: Dict[str, asyncio.Task] = {}
+        self.probe_slots = asyncio.Semaphore(max_concurrency)
         
-    async def check_website(self, url: str) -> Tuple[str, int, int]:
+    @staticmethod
+    async def check_website(
+        url: str,
+        timeout: float = 5.0,
+        expected_status: int = 200,
+        probe_type: str = "http"
+    ) -> Tuple[str, int, int]:
         """Check a single website and return status, response time, and status code"""
         try:
             start_time = time.time()
             
-            timeout = aiohttp.ClientTimeout(total=5)  # 5 second timeout
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                async with session.get(url, allow_redirects=True) as response:
+            client_timeout = aiohttp.ClientTimeout(total=timeout)
+            method = "HEAD" if probe_type == "head" else "GET"
+            async with aiohttp.ClientSession(timeout=client_timeout) as session:
+                async with session.request(method, url, allow_redirects=True) as response:
                     end_time = time.time()
                     response_time = int((end_time - start_time) * 1000)  # Convert to milliseconds
                     
-                    if response.status == 200:
+                    if response.status == expected_status:
                         return "online", response_time, response.status
                     elif 400 <= response.status < 500:
                         return "degraded", response_time, response.status
@@ -39,7 +85,7 @@ class WebsiteMonitor:
                         
         except asyncio.TimeoutError:
             logger.warning(f"Timeout checking {url}")
-            return "offline", 5000, 0  # 5 second timeout
+            return "offline", int(timeout * 1000), 0
         except aiohttp.ClientError as e:
             logger.warning(f"Client error checking {url}: {e}")
             return "offline", 0, 0
@@ -47,56 +93,103 @@ class WebsiteMonitor:
             logger.error(f"Unexpected error checking {url}: {e}")
             return "offline", 0, 0
     
-    async def check_all_websites(self) -> Dict[str, Dict]:
-        """Check all websites and return their status"""
-        results = {}
-        
-        for url in self.websites:
-            try:
-                website_name = url.replace("https://", "").replace("http://", "")
-                status, response_time, status_code = await self.check_website(url)
-                
-                # Store in database
-                website_status = WebsiteStatus(
-                    website=website_name,
-                    status=status,
-                    responseTime=response_time,
-                    statusCode=status_code
+    async def check_target(self, target: Target) -> Dict:
+        """Check one target, record the result and queue it for persistence"""
+        website_name = target.name
+        try:
+            async with self.probe_slots:
+                status, response_time, status_code = await self.check_website(
+                    target.url, target.timeout, target.expectedStatus, target.probeType
                 )
-                
-                await self.db.website_status.insert_one(website_status.dict())
-                
-                results[website_name] = {
-                    "status": status,
-                    "responseTime": response_time,
-                    "lastChecked": website_status.checkedAt,
-                    "statusCode": status_code
-                }
-                
-                logger.info(f"Checked {website_name}: {status} ({response_time}ms)")
-                
-            except Exception as e:
-                logger.error(f"Error processing {url}: {e}")
-                website_name = url.replace("https://", "").replace("http://", "")
-                results[website_name] = {
-                    "status": "offline",
-                    "responseTime": 0,
-                    "lastChecked": datetime.utcnow(),
-                    "statusCode": 0
-                }
-        
+            
+            degraded_reason = "status_code" if status == "degraded" else None
+            anomaly_score = None
+            if status == "online":
+                # Flag sustained slowdowns before they turn into timeouts; the check still
+                # succeeded, so status stays online and uptime/SLA availability are unaffected
+                slow, anomaly_score = self.detector.observe(website_name, response_time, datetime.utcnow())
+                if slow:
+                    degraded_reason = "latency"
+            
+            # Queue for the persistence worker so a slow database never stalls probing
+            website_status = WebsiteStatus(
+                website=website_name,
+                status=status,
+                responseTime=response_time,
+                statusCode=status_code,
+                degradedReason=degraded_reason,
+                anomalyScore=anomaly_score,
+                region=self.region
+            )
+            
+            self.recent.record(
+                website_name, website_status.checkedAt, status, response_time, status_code
+            )
+            self.writer.submit(website_status.dict())
+            
+            logger.info(f"Checked {website_name}: {status} ({response_time}ms)")
+            
+            return {
+                "status": status,
+                "responseTime": response_time,
+                "lastChecked": website_status.checkedAt,
+                "statusCode": status_code,
+                "degradedReason": degraded_reason,
+                "anomalyScore": anomaly_score
+            }
+            
+        except Exception as e:
+            logger.error(f"Error processing {target.url}: {e}")
+            return {
+                "status": "offline",
+                "responseTime": 0,
+                "lastChecked": datetime.utcnow(),
+                "statusCode": 0
+            }
+    
+    async def check_targets(self, targets: List[Target]) -> Dict[str, Dict]:
+        """Check targets concurrently and return their status by name"""
+        results = await asyncio.gather(*(self.check_target(target) for target in targets))
+        results = {target.name: result for target, result in zip(targets, results)}
+        self.latest.update(results)
+        self.updated = True
         return results
     
+    async def run_target(self, target: Target):
+        """Probe one scheduled target and make its result the latest"""
+        try:
+            result = await self.check_target(target)
+            # The target may have been removed from the registry while it was probed
+            if target.name in self.next_due:
+                self.latest[target.name] = result
+                self.updated = True
+            else:
+                self.detector.forget(target.name)
+                self.recent.forget(target.name)
+        finally:
+            self.inflight.pop(target.name, None)
+    
+    def schedule(self, target: Target):
+        """Start probing a due target unless its previous check is still running"""
+        if target.name in self.inflight:
+            logger.warning(f"Skipping check of {target.name}, previous check still running")
+            return
+        self.inflight[target.name] = asyncio.create_task(self.run_target(target))
+    
+    async def check_all_websites(self) -> Dict[str, Dict]:
+        """Check all enabled websites and return their status"""
+        return await self.check_targets(self.registry.enabled())
+    
     async def get_latest_status(self) -> Dict[str, Dict]:
         """Get the latest status for all websites from database"""
         results = {}
         
-        for url in self.websites:
-            website_name = url.replace("https://", "").replace("http://", "")
+        for target in self.registry.enabled():
+            website_name = target.name
             
-            # Get latest status from database
+            # Get latest status from database; agent results are served per region instead
             latest = await self.db.website_status.find_one(
-                {"website": website_name},
+                {"website": website_name, "agent": None},
                 sort=[("checkedAt", -1)]
             )
             
@@ -105,7 +198,9 @@ class WebsiteMonitor:
                     "status": latest["status"],
                     "responseTime": latest["responseTime"],
                     "lastChecked": latest["checkedAt"],
-                    "statusCode": latest["statusCode"]
+                    "statusCode": latest["statusCode"],
+                    "degradedReason": latest.get("degradedReason"),
+                    "anomalyScore": latest.get("anomalyScore")
                 }
             else:
                 # No data in database, return unknown status
@@ -121,9 +216,10 @@ class WebsiteMonitor:
     def calculate_overall_status(self, websites: Dict[str, Dict]) -> str:
         """Calculate overall system status based on individual website statuses"""
         statuses = [site["status"] for site in websites.values()]
+        slow = any(site.get("degradedReason") == "latency" for site in websites.values())
         
         if all(status == "online" for status in statuses):
-            return "operational"
+            return "degraded" if slow else "operational"
         elif any(status == "offline" for status in statuses):
             if all(status == "offline" for status in statuses):
                 return "outage"
@@ -134,78 +230,138 @@ class WebsiteMonitor:
         else:
             return "checking"
     
-    async def calculate_uptime_history(self) -> List[Dict]:
-        """Calculate 24-hour uptime history"""
-        uptime_data = []
+    async def calculate_uptime_history(self, region: Optional[str] = None) -> List[Dict]:
+        """Calculate 24-hour uptime history, optionally for checks from one region"""
         now = datetime.utcnow()
+        first_hour = now.replace(minute=0, second=0, microsecond=0) - timedelta(hours=23)
+        
+        # Count total checks and successful checks per hour from one range query
+        total_checks = [0] * 24
+        successful_checks = [0] * 24
+        query = {
+            "website": {"$in": [target.name for target in self.registry.enabled()]},
+            "checkedAt": {
+                "$gte": first_hour,
+                "$lt": first_hour + timedelta(hours=24)
+            }
+        }
+        if region:
+            query["region"] = region
+        cursor = self.db.website_status.find(query, {"_id": 0, "checkedAt": 1, "status": 1})
+        async for check in cursor:
+            hour = int((check["checkedAt"] - first_hour).total_seconds() // 3600)
+            total_checks[hour] += 1
+            if check["status"] == "online":
+                successful_checks[hour] += 1
         
+        uptime_data = []
         for hour in range(24):
-            hour_start = now.replace(minute=0, second=0, microsecond=0) - timedelta(hours=23-hour)
-            hour_end = hour_start + timedelta(hours=1)
-            
-            # Count total checks and successful checks for this hour
-            total_checks = 0
-            successful_checks = 0
-            
-            for url in self.websites:
-                website_name = url.replace("https://", "").replace("http://", "")
-                
-                # Get all checks for this website in this hour
-                checks = await self.db.website_status.find({
-                    "website": website_name,
-                    "checkedAt": {
-                        "$gte": hour_start,
-                        "$lt": hour_end
-                    }
-                }).to_list(None)
-                
-                total_checks += len(checks)
-                successful_checks += len([c for c in checks if c["status"] == "online"])
-            
             # Calculate uptime percentage
-            if total_checks > 0:
-                uptime_percentage = (successful_checks / total_checks) * 100
+            if total_checks[hour] > 0:
+                uptime_percentage = (successful_checks[hour] / total_checks[hour]) * 100
             else:
                 uptime_percentage = 100  # Assume 100% if no data
             
             uptime_data.append({
                 "hour": hour,
                 "percentage": round(uptime_percentage, 1),
-                "incidents": total_checks - successful_checks
+                "incidents": total_checks[hour] - successful_checks[hour]
             })
         
         return uptime_data
     
+    async def refresh_uptime(self):
+        """Keep the published uptime history current without holding up probes or snapshots"""
+        while self.monitoring:
+            try:
+                self.uptime = await asyncio.wait_for(self.calculate_uptime_history(), self.uptime_timeout)
+                self.updated = True
+            except asyncio.TimeoutError:
+                logger.warning(f"Uptime refresh timed out after {self.uptime_timeout}s, keeping previous history")
+            except Exception as e:
+                logger.error(f"Error refreshing uptime history: {e}")
+            await asyncio.sleep(self.uptime_refresh)
+    
+    async def publish_snapshot(self):
+        """Publish latest statuses, overall status and the last computed uptime for other workers to serve"""
+        websites = {}
+        for target in self.registry.enabled():
+            websites[target.name] = self.latest.get(target.name) or {
+                "status": "checking",
+                "responseTime": 0,
+                "lastChecked": datetime.utcnow(),
+                "statusCode": 0
+            }
+        
+        await asyncio.to_thread(
+            self.snapshot.publish, websites, self.calculate_overall_status(websites), self.uptime
+        )
+    
+    async def publish_recent(self):
+        """Publish the recent-check rings for other workers to serve"""
+        # Copy the arrays on the loop so probes cannot change them mid-publish; build the lists off it
+        recent = self.recent.copy()
+        await asyncio.to_thread(lambda: self.recent_snapshot.write({"recent": recent.columns()}))
+    
+    def due_targets(self, now: float) -> List[Target]:
+        """Return targets whose interval has elapsed and schedule their next check"""
+        enabled = self.registry.enabled()
+        
+        # Forget targets removed from the registry; new ones are due immediately
+        names = {target.name for target in enabled}
+        for name in list(self.next_due):
+            if name not in names:
+                del self.next_due[name]
+                self.detector.forget(name)
+                self.recent.forget(name)
+                self.latest.pop(name, None)
+        
+        due = [target for target in enabled if self.next_due.get(target.name, 0) <= now]
+        for target in due:
+            self.next_due[target.name] = now + target.interval
+        return due
+    
     async def start_monitoring(self):
         """Start the background monitoring process"""
         logger.info("Starting website monitoring...")
         self.monitoring = True
         
-        while self.monitoring:
-            try:
-                await self.check_all_websites()
-                await asyncio.sleep(30)  # Check every 30 seconds
-            except Exception as e:
-                logger.error(f"Error in monitoring loop: {e}")
-                await asyncio.sleep(30)  # Continue monitoring even if there's an error
+        try:
+            self.latest = await self.get_latest_status()
+        except Exception as e:
+            logger.error(f"Error loading latest status: {e}")
+        
+        uptime_task = asyncio.create_task(self.refresh_uptime()) if self.snapshot else None
+        try:
+            while self.monitoring:
+                try:
+                    await self.registry.refresh()
+                    now = time.monotonic()
+                    for target in self.due_targets(now):
+                        self.schedule(target)
+                    
+                    # Publish finished checks in batches rather than after every single probe
+                    if self.snapshot and self.updated and now - self.published_at >= self.publish_interval:
+                        self.updated = False
+                        self.published_at = now
+                        await self.publish_snapshot()
+                    if self.recent_snapshot and now - self.recent_published_at >= self.recent_publish_interval:
+                        self.recent_published_at = now
+                        await self.publish_recent()
+                    
+                    # Wake for the next due target, but often enough to publish results and notice registry changes
+                    next_check = min(self.next_due.values(), default=now + 5)
+                    await asyncio.sleep(min(max(next_check - time.monotonic(), 0.1), self.publish_interval, 5))
+                except Exception as e:
+                    logger.error(f"Error in monitoring loop: {e}")
+                    await asyncio.sleep(30)  # Continue monitoring even if there's an error
+        finally:
+            if uptime_task:
+                uptime_task.cancel()
+            for task in list(self.inflight.values()):
+                task.cancel()
     
     def stop_monitoring(self):
         """Stop the background monitoring process"""
         logger.info("Stopping website monitoring...")
         self.monitoring = False
-    
-    async def cleanup_old_data(self):
-        """Clean up data older than 30 days"""
-        cutoff_date = datetime.utcnow() - timedelta(days=30)
-        
-        result = await self.db.website_status.delete_many({
-            "createdAt": {"$lt": cutoff_date}
-        })
-        
-        logger.info(f"Cleaned up {result.deleted_count} old website status records")
-        
-        result = await self.db.uptime_history.delete_many({
-            "createdAt": {"$lt": cutoff_date}
-        })
-        
-        logger.info(f"Cleaned up {result.deleted_count} old uptime history records")
\ No newline at end of file
@@ -18,13 +18,11 @@ const ResourceMonitor = () => {
     const fetchWebsiteStatus = async () => {
       try {
         setIsLoading(true);
-        const response = await websiteStatusApi.getAllStatus();
+        // Statuses and uptime arrive together in a single round trip
+        const response = await websiteStatusApi.getDashboard();
         setWebsiteStatus(response.websites);
         setOverallStatus(response.overall);
-        
-        // Also fetch uptime data
-        const uptimeResponse = await websiteStatusApi.getUptimeData();
-        setUptimeData(uptimeResponse.uptime);
+        setUptimeData(response.uptime);
         
       } catch (error) {
         console.error('Failed to fetch website status:', error);
@@ -60,6 +60,17 @@ export const websiteStatusApi = {
     }
   },
 
+  // Get website statuses and uptime data in one request
+  getDashboard: async () => {
+    try {
+      const response = await apiClient.get('/status/dashboard');
+      return response.data;
+    } catch (error) {
+      console.error('Failed to fetch dashboard data:', error);
+      throw error;
+    }
+  },
+
   // Get uptime data
   getUptimeData: async () => {
     try {
@@ -0,0 +1,6 @@
+import sys
+from pathlib import Path
+
+# Backend modules import each other by bare name, as they do when the server runs from backend/
+backend_dir = Path(__file__).parent.parent / "backend"
+sys.path.insert(0, str(backend_dir))
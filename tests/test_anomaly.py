@@ -0,0 +1,62 @@
+from datetime import datetime
+
+from anomaly import LatencyDetector
+
+NOW = datetime(2026, 1, 1, 12, 0, 0)
+
+
+def warm(detector, website="site", value=100, count=20):
+    for _ in range(count):
+        detector.observe(website, value, NOW)
+
+
+def test_no_flag_during_warmup():
+    detector = LatencyDetector(warmup=20, sustain=1)
+    warm(detector, count=19)
+
+    assert detector.observe("site", 5000, NOW) == (False, 0.0)
+
+
+def test_flags_only_sustained_regression():
+    detector = LatencyDetector(warmup=20, sustain=3)
+    warm(detector)
+
+    assert detector.observe("site", 400, NOW)[0] is False
+    assert detector.observe("site", 400, NOW)[0] is False
+    degraded, score = detector.observe("site", 400, NOW)
+    assert degraded is True
+    assert score >= detector.threshold
+
+
+def test_single_spike_resets_streak():
+    detector = LatencyDetector(warmup=20, sustain=2)
+    warm(detector)
+
+    assert detector.observe("site", 400, NOW)[0] is False
+    assert detector.observe("site", 100, NOW)[0] is False
+    assert detector.observe("site", 400, NOW)[0] is False
+
+
+def test_small_absolute_increase_is_ignored():
+    detector = LatencyDetector(warmup=20, sustain=1, min_increase_ms=100)
+    warm(detector)
+
+    degraded, score = detector.observe("site", 150, NOW)
+    assert degraded is False
+    assert score >= detector.threshold
+
+
+def test_sustained_regression_keeps_scoring_high():
+    detector = LatencyDetector(warmup=20, sustain=3)
+    warm(detector)
+
+    results = [detector.observe("site", 400, NOW)[0] for _ in range(30)]
+    assert all(results[2:])
+
+
+def test_forget_restarts_warmup():
+    detector = LatencyDetector(warmup=20, sustain=1)
+    warm(detector)
+    detector.forget("site")
+
+    assert detector.observe("site", 5000, NOW) == (False, 0.0)
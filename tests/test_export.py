@@ -0,0 +1,72 @@
+import asyncio
+import csv
+import gzip
+import io
+import json
+from datetime import datetime, timedelta, timezone
+
+from export import EXPORT_FIELDS, iter_status_export, to_naive_utc
+from fake_mongo import FakeMongoClient
+
+START = datetime(2026, 1, 1)
+
+
+def seeded_db(count=5):
+    db = FakeMongoClient()["test"]
+    docs = [
+        {
+            "website": "a.example",
+            "status": "online" if i % 2 == 0 else "offline",
+            "responseTime": 100 + i,
+            "statusCode": 200 if i % 2 == 0 else 0,
+            "checkedAt": START + timedelta(minutes=i),
+            "createdAt": START + timedelta(minutes=i),
+        }
+        for i in range(count)
+    ]
+    docs.append({**docs[0], "website": "b.example"})
+    asyncio.run(db.website_status.insert_many(docs))
+    return db
+
+
+def export(db, start, end, **kwargs):
+    async def collect():
+        return b"".join([chunk async for chunk in iter_status_export(db, "a.example", start, end, **kwargs)])
+    return asyncio.run(collect())
+
+
+def test_to_naive_utc():
+    aware = datetime(2026, 1, 1, 14, 0, tzinfo=timezone(timedelta(hours=2)))
+
+    assert to_naive_utc(aware) == datetime(2026, 1, 1, 12, 0)
+    assert to_naive_utc(START) == START
+    assert to_naive_utc(None) is None
+
+
+def test_ndjson_export_is_ordered_and_bounded():
+    db = seeded_db()
+    body = export(db, START + timedelta(minutes=1), START + timedelta(minutes=4), batch_size=2)
+
+    rows = [json.loads(line) for line in body.decode().splitlines()]
+    assert [row["responseTime"] for row in rows] == [101, 102, 103]
+    assert list(rows[0]) == EXPORT_FIELDS
+    assert rows[0]["checkedAt"] == "2026-01-01T00:01:00"
+    assert rows[0]["agent"] is None
+
+
+def test_csv_export_has_header_row():
+    db = seeded_db()
+    body = export(db, START, START + timedelta(hours=1), fmt="csv")
+
+    rows = list(csv.reader(io.StringIO(body.decode())))
+    assert rows[0] == EXPORT_FIELDS
+    assert len(rows) == 6
+    assert rows[1][:5] == ["a.example", "online", "100", "200", "2026-01-01T00:00:00"]
+
+
+def test_gzip_export_matches_plain_export():
+    db = seeded_db(count=50)
+    plain = export(db, START, START + timedelta(hours=1), batch_size=7)
+    compressed = export(db, START, START + timedelta(hours=1), batch_size=7, compress=True)
+
+    assert gzip.decompress(compressed) == plain
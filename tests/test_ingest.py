@@ -0,0 +1,61 @@
+import asyncio
+import gzip
+import zlib
+
+import pytest
+
+from ingest import authenticate_agent, decode_body, parse_agent_tokens, read_limited
+
+TOKENS = parse_agent_tokens("eu-1=secret-eu, us-1=secret-us,broken,=nobody")
+
+
+def test_parse_agent_tokens_skips_malformed_pairs():
+    assert TOKENS == {"secret-eu": "eu-1", "secret-us": "us-1"}
+
+
+@pytest.mark.parametrize("header, agent", [
+    ("Bearer secret-eu", "eu-1"),
+    ("bearer secret-us", "us-1"),
+    ("Bearer wrong", None),
+    ("Basic secret-eu", None),
+    ("Bearer ", None),
+    ("", None),
+    (None, None),
+])
+def test_authenticate_agent(header, agent):
+    assert authenticate_agent(TOKENS, header) == agent
+
+
+def test_decode_identity_and_compressed_bodies():
+    body = b'{"region": "eu", "results": []}'
+
+    assert decode_body(body, None) == body
+    assert decode_body(gzip.compress(body), "gzip") == body
+    assert decode_body(zlib.compress(body), "deflate") == body
+
+
+def test_decode_rejects_oversized_bodies():
+    with pytest.raises(OverflowError):
+        decode_body(b"x" * 11, None, max_size=10)
+    with pytest.raises(OverflowError):
+        decode_body(gzip.compress(b"x" * 10000), "gzip", max_size=1000)
+
+
+@pytest.mark.parametrize("body, encoding", [
+    (b"not gzip at all", "gzip"),
+    (gzip.compress(b"x" * 1000)[:20], "gzip"),
+    (b"{}", "br"),
+])
+def test_decode_rejects_invalid_bodies(body, encoding):
+    with pytest.raises(ValueError):
+        decode_body(body, encoding)
+
+
+def test_read_limited_stops_at_max_size():
+    async def chunks(sizes):
+        for size in sizes:
+            yield b"x" * size
+
+    assert asyncio.run(read_limited(chunks([5, 5]), max_size=10)) == b"x" * 10
+    with pytest.raises(OverflowError):
+        asyncio.run(read_limited(chunks([6, 6]), max_size=10))
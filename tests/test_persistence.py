@@ -0,0 +1,187 @@
+import asyncio
+
+import pytest
+from bson import ObjectId, json_util
+from pymongo.errors import AutoReconnect, BulkWriteError
+
+from models import WebsiteStatus
+from persistence import DUPLICATE_KEY_ERROR, ResultWriter, insert_new
+
+
+class FlakyCollection:
+    """Collection stand-in that stores inserted docs and fails the insert_many calls listed in fail_calls"""
+
+    def __init__(self, fail_calls=(), error=None):
+        self.docs = []
+        self.calls = 0
+        self.fail_calls = set(fail_calls)
+        self.error = error or ConnectionError("database unavailable")
+
+    async def insert_many(self, docs, ordered=True):
+        self.calls += 1
+        if self.calls in self.fail_calls:
+            raise self.error
+        self.docs.extend(docs)
+
+
+class UniqueCollection:
+    """Collection stand-in with pymongo's _id handling: missing ones are assigned, duplicates are refused.
+
+    Inserts on the calls listed in lost_replies are applied but then raise, like a reply lost in transit.
+    """
+
+    def __init__(self, lost_replies=()):
+        self.docs = {}
+        self.calls = 0
+        self.lost_replies = set(lost_replies)
+
+    async def insert_many(self, docs, ordered=True):
+        self.calls += 1
+        errors = []
+        for index, doc in enumerate(docs):
+            doc.setdefault("_id", ObjectId())
+            if doc["_id"] in self.docs:
+                errors.append({"index": index, "code": DUPLICATE_KEY_ERROR})
+            else:
+                self.docs[doc["_id"]] = dict(doc)
+        if self.calls in self.lost_replies:
+            raise AutoReconnect("connection closed")
+        if errors:
+            raise BulkWriteError({"writeErrors": errors, "nInserted": len(docs) - len(errors)})
+
+
+def stored_ids(collection):
+    return sorted(doc["_id"] for doc in collection.docs)
+
+
+def spilled_ids(path):
+    with open(path, encoding="utf-8") as f:
+        return [json_util.loads(line)["_id"] for line in f]
+
+
+async def run_until(writer, condition, timeout=2.0):
+    task = asyncio.create_task(writer.run())
+    try:
+        deadline = asyncio.get_running_loop().time() + timeout
+        while not condition():
+            assert asyncio.get_running_loop().time() < deadline, "writer did not catch up"
+            await asyncio.sleep(0.01)
+    finally:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+
+def test_queue_overflow_is_replayed_while_database_is_healthy(tmp_path):
+    async def scenario():
+        collection = FlakyCollection()
+        writer = ResultWriter(collection, tmp_path / "spill.ndjson", max_queue=1)
+        for i in range(3):
+            writer.submit({"_id": i, "website": "a.example"})
+
+        assert writer.has_spill
+        assert not writer.healthy
+        await run_until(writer, lambda: len(collection.docs) == 3)
+
+        assert stored_ids(collection) == [0, 1, 2]
+        assert writer.stats["spilled"] == 2
+        assert writer.stats["replayed"] == 2
+        assert writer.healthy
+        assert not writer.has_spill
+
+    asyncio.run(scenario())
+
+
+def test_failed_write_spills_and_replays_after_recovery(tmp_path):
+    async def scenario():
+        collection = FlakyCollection(fail_calls={1})
+        writer = ResultWriter(collection, tmp_path / "spill.ndjson", retry_interval=0.01)
+        writer.submit({"_id": 0})
+        await run_until(writer, lambda: not writer.healthy)
+        assert spilled_ids(writer.spill_path) == [0]
+
+        writer.submit({"_id": 1})
+        await run_until(writer, lambda: len(collection.docs) == 2)
+        assert stored_ids(collection) == [0, 1]
+        assert writer.healthy
+
+    asyncio.run(scenario())
+
+
+def test_failed_replay_keeps_unreplayed_results(tmp_path):
+    async def scenario():
+        collection = FlakyCollection(fail_calls={2})
+        replayed = []
+
+        async def on_replay(docs):
+            replayed.extend(doc["_id"] for doc in docs)
+
+        writer = ResultWriter(collection, tmp_path / "spill.ndjson", batch_size=2, on_replay=on_replay)
+        writer._spill([json_util.dumps({"_id": i}) + "\n" for i in range(5)])
+
+        with pytest.raises(ConnectionError):
+            await writer._replay_spill()
+
+        # The first chunk is stored; the failed chunk and the unread rest go back to the spill file
+        assert stored_ids(collection) == [0, 1]
+        assert replayed == [0, 1]
+        assert spilled_ids(writer.spill_path) == [2, 3, 4]
+        assert not writer.replay_path.exists()
+
+        await writer._replay_spill()
+        assert stored_ids(collection) == [0, 1, 2, 3, 4]
+        assert writer.stats["replayed"] == 5
+        assert not writer.has_spill
+
+    asyncio.run(scenario())
+
+
+def test_replay_after_lost_reply_stores_results_once(tmp_path):
+    async def scenario():
+        collection = UniqueCollection(lost_replies={2})
+        writer = ResultWriter(collection, tmp_path / "spill.ndjson", max_queue=1)
+        for website in ("a.example", "b.example", "c.example"):
+            writer.submit(WebsiteStatus(website=website, status="online", responseTime=100, statusCode=200).dict())
+
+        await writer._insert(await writer._drain_batch())
+        # The replayed chunk is stored, but its reply is lost and it is spilled again
+        with pytest.raises(AutoReconnect):
+            await writer._replay_spill()
+        assert writer.has_spill
+
+        await writer._replay_spill()
+        assert sorted(doc["website"] for doc in collection.docs.values()) == ["a.example", "b.example", "c.example"]
+        assert not writer.has_spill
+
+    asyncio.run(scenario())
+
+
+def test_stop_spills_queued_results(tmp_path):
+    writer = ResultWriter(FlakyCollection(), tmp_path / "spill.ndjson")
+    writer.submit({"_id": 0})
+    writer.submit({"_id": 1})
+
+    writer.stop()
+
+    assert spilled_ids(writer.spill_path) == [0, 1]
+    assert writer.queue.empty()
+
+
+def test_without_spill_path_results_are_dropped():
+    writer = ResultWriter(FlakyCollection(), None, max_queue=1)
+    writer.submit({"_id": 0})
+    writer.submit({"_id": 1})
+
+    assert writer.stats["dropped"] == 1
+    assert not writer.has_spill
+
+
+def test_insert_new_tolerates_duplicates_only():
+    duplicate = BulkWriteError({"writeErrors": [{"code": 11000}], "nInserted": 1})
+    assert asyncio.run(insert_new(FlakyCollection({1}, duplicate), [{"_id": 0}, {"_id": 1}])) == 1
+
+    other = BulkWriteError({"writeErrors": [{"code": 121}], "nInserted": 1})
+    with pytest.raises(BulkWriteError):
+        asyncio.run(insert_new(FlakyCollection({1}, other), [{"_id": 0}, {"_id": 1}]))
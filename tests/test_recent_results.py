@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta
+
+from recent_results import ProbeRingBuffer, RecentResults, rows_from_columns
+
+START = datetime(2026, 1, 1, 12, 0, 0)
+
+
+def fill(buffer, count):
+    for i in range(count):
+        buffer.append(START + timedelta(seconds=i), "online", i, 200)
+
+
+def test_latest_before_wraparound():
+    buffer = ProbeRingBuffer(4)
+    fill(buffer, 3)
+
+    checks = buffer.latest()
+    assert len(buffer) == 3
+    assert [check["responseTime"] for check in checks] == [0, 1, 2]
+    assert checks[0]["checkedAt"] == START
+
+
+def test_wraparound_keeps_most_recent_oldest_first():
+    buffer = ProbeRingBuffer(4)
+    fill(buffer, 10)
+
+    assert len(buffer) == 4
+    assert [check["responseTime"] for check in buffer.latest()] == [6, 7, 8, 9]
+    assert [check["responseTime"] for check in buffer.latest(2)] == [8, 9]
+    assert buffer.latest(0) == []
+    assert len(buffer.latest(100)) == 4
+
+
+def test_unknown_status_is_stored_as_offline():
+    buffer = ProbeRingBuffer(2)
+    buffer.append(START, "checking", 0, 0)
+
+    assert buffer.latest()[0]["status"] == "offline"
+
+
+def test_columns_round_trip_across_wraparound():
+    buffer = ProbeRingBuffer(4)
+    for i in range(6):
+        buffer.append(START + timedelta(seconds=i), "online" if i % 2 else "degraded", i, 200 + i)
+
+    columns = buffer.columns()
+    assert columns["capacity"] == 4
+    assert rows_from_columns(columns) == buffer.latest()
+    assert rows_from_columns(columns, 3) == buffer.latest(3)
+
+
+def test_forget_drops_buffer():
+    recent = RecentResults(capacity=8)
+    recent.record("a.example", START, "online", 100, 200)
+    recent.record("b.example", START, "offline", 0, 0)
+
+    recent.forget("a.example")
+    recent.forget("missing.example")
+
+    assert recent.get("a.example") is None
+    assert list(recent.columns()) == ["b.example"]
+
+
+def test_copy_is_independent_of_later_probes():
+    recent = RecentResults(capacity=4)
+    recent.record("a.example", START, "online", 100, 200)
+
+    copy = recent.copy()
+    recent.record("a.example", START + timedelta(seconds=1), "offline", 0, 0)
+    recent.record("b.example", START, "online", 100, 200)
+
+    assert list(copy.columns()) == ["a.example"]
+    assert copy.columns()["a.example"]["status"] == ["online"]
+    assert len(recent.get("a.example")) == 2
@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from reporting import compute_sla, month_bounds
+
+START = datetime(2026, 1, 1)
+
+
+def sla(online, end_offset, slo=99.9, response_times=None):
+    """compute_sla over checks one minute apart from START"""
+    checked_at = np.array(
+        [START + timedelta(minutes=i) for i in range(len(online))], dtype="datetime64[ms]"
+    )
+    if response_times is None:
+        response_times = [100] * len(online)
+    return compute_sla(
+        checked_at,
+        np.array(online, dtype=bool),
+        np.array(response_times, dtype=np.int64),
+        START + timedelta(minutes=end_offset),
+        slo,
+    )
+
+
+def test_month_bounds_rolls_over_year():
+    assert month_bounds("2026-02") == (datetime(2026, 2, 1), datetime(2026, 3, 1))
+    assert month_bounds("2025-12") == (datetime(2025, 12, 1), datetime(2026, 1, 1))
+
+
+def test_no_checks():
+    report = compute_sla(
+        np.array([], dtype="datetime64[ms]"), np.array([], dtype=bool),
+        np.array([], dtype=np.int64), START, 99.9
+    )
+    assert report["checks"] == 0
+    assert report["availability"] is None
+    assert report["mttrSeconds"] is None
+    assert report["errorBudget"] == {"slo": 99.9, "burn": None, "remaining": None}
+
+
+def test_all_online_has_no_incidents():
+    report = sla([True] * 5, end_offset=5)
+    assert report["availability"] == 100.0
+    assert report["incidents"] == 0
+    assert report["downtimeSeconds"] == 0.0
+    assert report["mttrSeconds"] is None
+    assert report["mtbfSeconds"] is None
+    assert report["errorBudget"]["burn"] == 0.0
+
+
+def test_recovered_incident():
+    # Down from the check at minute 1 until the passing check at minute 3
+    report = sla([True, False, False, True], end_offset=4)
+    assert report["incidents"] == 1
+    assert report["downtimeSeconds"] == 120.0
+    assert report["mttrSeconds"] == 120.0
+    assert report["mtbfSeconds"] == 120.0
+    assert report["availability"] == 50.0
+
+
+def test_incident_open_at_period_end():
+    report = sla([True, True, False], end_offset=3)
+    assert report["incidents"] == 1
+    assert report["downtimeSeconds"] == 60.0
+
+
+def test_incident_at_first_check():
+    report = sla([False, True, True], end_offset=3)
+    assert report["incidents"] == 1
+    assert report["downtimeSeconds"] == 60.0
+    assert report["mtbfSeconds"] == 120.0
+
+
+def test_separate_incidents():
+    report = sla([False, True, False, True], end_offset=4)
+    assert report["incidents"] == 2
+    assert report["downtimeSeconds"] == 120.0
+    assert report["mttrSeconds"] == 60.0
+
+
+def test_latency_uses_online_checks_only():
+    report = sla([True, False, True], end_offset=3, response_times=[100, 5000, 300])
+    assert report["latency"]["max"] == 300
+    assert report["latency"]["mean"] == 200.0
+
+
+def test_error_budget_exhausted():
+    report = sla([True, False], end_offset=2, slo=99.0)
+    assert report["errorBudget"]["burn"] == 50.0
+    assert report["errorBudget"]["remaining"] == 0.0
@@ -0,0 +1,66 @@
+import os
+import time
+
+from snapshot import SnapshotPublisher, SnapshotReader, claim_monitor_role
+
+WEBSITES = {"a.example": {"status": "online", "responseTime": 120, "statusCode": 200}}
+
+
+def test_only_one_process_claims_the_monitor_role(tmp_path):
+    lock_path = tmp_path / "run" / "monitor.lock"
+    holder = claim_monitor_role(lock_path)
+    try:
+        assert holder is not None
+        assert claim_monitor_role(lock_path) is None
+    finally:
+        holder.close()
+
+    released = claim_monitor_role(lock_path)
+    assert released is not None
+    released.close()
+
+
+def test_reader_without_snapshot(tmp_path):
+    assert SnapshotReader(tmp_path / "status.json").get() is None
+
+
+def test_reader_follows_published_versions(tmp_path):
+    path = tmp_path / "status.json"
+    publisher = SnapshotPublisher(path)
+    reader = SnapshotReader(path)
+
+    publisher.publish(WEBSITES, "operational", [])
+    snapshot = reader.get()
+    assert snapshot["version"] == 1
+    assert snapshot["websites"] == WEBSITES
+    assert snapshot["overall"] == "operational"
+    assert reader.get() is snapshot  # unchanged file is not re-read
+
+    publisher.publish({}, "checking", [{"hour": 0, "percentage": 100.0, "incidents": 0}])
+    snapshot = reader.get()
+    assert snapshot["version"] == 2
+    assert snapshot["uptime"][0]["percentage"] == 100.0
+    assert not list(tmp_path.glob(".*.tmp"))
+
+
+def test_write_publishes_arbitrary_content(tmp_path):
+    path = tmp_path / "recent.json"
+    SnapshotPublisher(path).write({"recent": {"a.example": {"checkedAt": [1.5]}}})
+
+    assert SnapshotReader(path).get()["recent"] == {"a.example": {"checkedAt": [1.5]}}
+
+
+def test_stale_snapshot_is_ignored(tmp_path):
+    path = tmp_path / "status.json"
+    SnapshotPublisher(path).publish(WEBSITES, "operational", [])
+    stale = time.time() - 600
+    os.utime(path, (stale, stale))
+
+    assert SnapshotReader(path, max_age=300).get() is None
+
+
+def test_unreadable_snapshot_is_ignored(tmp_path):
+    path = tmp_path / "status.json"
+    path.write_bytes(b'{"version": 1, "websites"')
+
+    assert SnapshotReader(path).get() is None
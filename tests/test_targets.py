@@ -0,0 +1,88 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+from fake_mongo import FakeMongoClient
+from targets import TargetRegistry, parse_targets
+
+
+def write_targets(path, items, mtime):
+    path.write_text(json.dumps(items))
+    # Explicit mtimes, so a reload does not depend on filesystem timestamp resolution
+    os.utime(path, (mtime, mtime))
+
+
+def test_parse_targets_defaults_name_to_host():
+    targets = parse_targets([{"url": "https://a.example/health", "interval": 10}])
+
+    assert list(targets) == ["a.example"]
+    assert targets["a.example"].interval == 10
+    assert targets["a.example"].probeType == "http"
+
+
+@pytest.mark.parametrize("items", [
+    [{"url": "https://a.example"}, {"url": "https://a.example/other"}],
+    [{"url": "https://a.example", "probeType": "icmp"}],
+])
+def test_parse_targets_rejects_invalid_definitions(items):
+    with pytest.raises(ValueError):
+        parse_targets(items)
+
+
+def test_file_registry_reloads_only_when_file_changes(tmp_path):
+    async def scenario():
+        path = tmp_path / "targets.json"
+        write_targets(path, [{"url": "https://a.example"}, {"url": "https://b.example", "enabled": False}], 1000)
+        registry = TargetRegistry(path=path)
+
+        assert await registry.refresh() is True
+        assert "a.example" in registry and "b.example" in registry
+        assert [target.name for target in registry.enabled()] == ["a.example"]
+        assert registry.version == 1
+
+        assert await registry.refresh() is False
+
+        write_targets(path, [{"url": "https://c.example"}], 2000)
+        assert await registry.refresh() is True
+        assert list(registry.targets) == ["c.example"]
+        assert registry.get("a.example") is None
+        assert registry.version == 2
+
+    asyncio.run(scenario())
+
+
+def test_invalid_file_keeps_current_targets(tmp_path):
+    async def scenario():
+        path = tmp_path / "targets.json"
+        write_targets(path, [{"url": "https://a.example"}], 1000)
+        registry = TargetRegistry(path=path)
+        await registry.refresh()
+
+        path.write_text("[{not json")
+        os.utime(path, (2000, 2000))
+        assert await registry.refresh() is False
+        assert list(registry.targets) == ["a.example"]
+        assert registry.version == 1
+
+    asyncio.run(scenario())
+
+
+def test_collection_registry_rereads_after_interval():
+    async def scenario():
+        collection = FakeMongoClient()["test"].targets
+        await collection.insert_one({"url": "https://a.example"})
+        registry = TargetRegistry(collection=collection, reload_interval=3600)
+
+        assert await registry.load() is True
+        await collection.insert_one({"url": "https://b.example"})
+        # Not due yet
+        assert await registry.refresh() is False
+        assert len(registry) == 1
+
+        registry.reload_interval = 0
+        assert await registry.refresh() is True
+        assert sorted(registry.targets) == ["a.example", "b.example"]
+
+    asyncio.run(scenario())